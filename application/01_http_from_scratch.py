@@ -17,14 +17,35 @@ EXPERIMENT IDEAS:
 3. Compare with browser behavior
 """
 
+import functools
 import socket
 import ssl
+import time
+
+HTTP_METHODS = [
+    ("GET", "Retrieve resource (most common)"),
+    ("POST", "Submit data to server"),
+    ("PUT", "Update/replace resource"),
+    ("DELETE", "Remove resource"),
+    ("HEAD", "Like GET but only headers (no body)"),
+    ("OPTIONS", "Query supported methods"),
+    ("PATCH", "Partial modification"),
+]
+
+# The table never changes, so format it once at import time
+HTTP_METHODS_TABLE = "\n".join(
+    [f"\n{'Method':<10} {'Description'}", "-" * 60]
+    + [f"{method:<10} {desc}" for method, desc in HTTP_METHODS]
+)
+
+@functools.lru_cache(maxsize=None)
+def render_section(title):
+    """Build a section header (once per title)"""
+    return f"\n{'='*60}\n  {title}\n{'='*60}"
 
 def print_section(title):
     """Pretty print section headers"""
-    print(f"\n{'='*60}")
-    print(f"  {title}")
-    print('='*60)
+    print(render_section(title))
 
 def explain_http_layers():
     """Explain how HTTP sits on TCP"""
@@ -71,25 +92,33 @@ Example:
   <html>...</html>
     """)
 
-def build_http_request(host, path="/", method="GET"):
+# Headers that are the same for every request we send
+REQUEST_HEADERS = (
+    b"User-Agent: PracticalNetworking/1.0\r\n"
+    b"Accept: */*\r\n"
+)
+
+def build_http_request(host, path="/", method="GET", keep_alive=False):
     """Build HTTP request manually"""
+    connection = b"keep-alive" if keep_alive else b"close"
+    # REQUEST-LINE, Host header, fixed headers, then an empty line ends headers
+    return b"%s %s HTTP/1.1\r\nHost: %s\r\n%sConnection: %s\r\n\r\n" % (
+        method.encode(), path.encode(), host.encode(), REQUEST_HEADERS, connection)
+
+def describe_http_request(host, path="/", method="GET"):
+    """Build an HTTP request and explain its parts"""
     print_section(f"Building HTTP {method} Request")
     
-    # HTTP request format
-    request = f"{method} {path} HTTP/1.1\r\n"
-    request += f"Host: {host}\r\n"
-    request += "User-Agent: PracticalNetworking/1.0\r\n"
-    request += "Accept: */*\r\n"
-    request += "Connection: close\r\n"
-    request += "\r\n"  # Empty line ends headers
+    request = build_http_request(host, path, method)
+    request_str = request.decode()
     
     print(f"\nHTTP Request to {host}{path}:")
     print("-" * 60)
-    print(request)
+    print(request_str)
     print("-" * 60)
     
     print("\nRequest Breakdown:")
-    lines = request.split('\r\n')
+    lines = request_str.split('\r\n')
     print(f"Request Line: {lines[0]}")
     print(f"  Method: {method}")
     print(f"  Path: {path}")
@@ -99,7 +128,7 @@ def build_http_request(host, path="/", method="GET"):
         if line:
             print(f"  {line}")
     
-    return request.encode()
+    return request
 
 def send_http_request(host, port=80, path="/", use_ssl=False):
     """Send HTTP request over raw TCP"""
@@ -132,15 +161,18 @@ def send_http_request(host, port=80, path="/", use_ssl=False):
         
         # Step 5: Receive response
         print("5. Receiving HTTP response...")
-        response = b""
+        # bytearray grows in place; "bytes += data" would copy the whole
+        # response again for every chunk received
+        buf = bytearray()
         while True:
             try:
-                data = sock.recv(4096)
+                data = sock.recv(65536)
                 if not data:
                     break
-                response += data
+                buf.extend(data)
             except socket.timeout:
                 break
+        response = bytes(buf)
         
         print(f"   ✓ Received {len(response)} bytes")
         
@@ -154,6 +186,128 @@ def send_http_request(host, port=80, path="/", use_ssl=False):
         print(f"   ✗ Error: {e}")
         return None
 
+def read_http_response(sock, method="GET"):
+    """Read exactly one HTTP response from a socket
+
+    Returns (response_bytes, keep_open). With keep-alive the server does
+    not close the connection after answering, so we cannot just read
+    until EOF - the headers tell us where the response ends.
+    """
+    buf = bytearray()
+    
+    def recv_more():
+        data = sock.recv(65536)
+        if not data:
+            raise ConnectionError("Connection closed by server")
+        buf.extend(data)
+    
+    # Headers end at the first empty line
+    while b"\r\n\r\n" not in buf:
+        recv_more()
+    header_end = buf.index(b"\r\n\r\n") + 4
+    
+    lines = bytes(buf[:header_end]).decode('latin-1').split('\r\n')
+    status_code = int(lines[0].split(' ', 2)[1])
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            key, value = line.split(':', 1)
+            headers[key.strip().lower()] = value.strip().lower()
+    keep_open = headers.get('connection') != 'close'
+    
+    if method == "HEAD" or status_code in (204, 304) or status_code < 200:
+        # No body at all
+        end = header_end
+    elif headers.get('transfer-encoding') == 'chunked':
+        # Chunked body: "<hex size>\r\n<data>\r\n" ... "0\r\n\r\n"
+        pos = header_end
+        while True:
+            while b"\r\n" not in buf[pos:]:
+                recv_more()
+            line_end = buf.index(b"\r\n", pos)
+            size = int(bytes(buf[pos:line_end]).split(b';')[0], 16)
+            if size == 0:
+                while b"\r\n\r\n" not in buf[line_end:]:
+                    recv_more()
+                end = buf.index(b"\r\n\r\n", line_end) + 4
+                break
+            pos = line_end + 2 + size + 2
+            while len(buf) < pos:
+                recv_more()
+    elif 'content-length' in headers:
+        end = header_end + int(headers['content-length'])
+        while len(buf) < end:
+            recv_more()
+    else:
+        # No length given: the body runs until the server closes
+        try:
+            while True:
+                recv_more()
+        except ConnectionError:
+            pass
+        end = len(buf)
+        keep_open = False
+    
+    return bytes(buf[:end]), keep_open
+
+class HttpDemoClient:
+    """HTTP client that keeps connections open between requests"""
+    
+    # Building an SSL context loads the CA certificates, so share one
+    ssl_context = ssl.create_default_context()
+    
+    def __init__(self, timeout=5):
+        self.timeout = timeout
+        self.connections = {}  # (host, port, use_ssl) -> open socket
+    
+    def connect(self, host, port, use_ssl):
+        """Open a new TCP (and TLS) connection"""
+        sock = socket.create_connection((host, port), timeout=self.timeout)
+        if use_ssl:
+            sock = self.ssl_context.wrap_socket(sock, server_hostname=host)
+        return sock
+    
+    def exchange(self, sock, host, path, method):
+        """Send one request and read one response"""
+        sock.sendall(build_http_request(host, path, method, keep_alive=True))
+        return read_http_response(sock, method)
+    
+    def request(self, host, port=80, path="/", use_ssl=False, method="GET"):
+        """Send a request, reusing an open connection when we have one
+
+        Returns (response_bytes, reused_connection).
+        """
+        key = (host, port, use_ssl)
+        sock = self.connections.pop(key, None)
+        reused = sock is not None
+        
+        try:
+            if sock is None:
+                sock = self.connect(host, port, use_ssl)
+            response, keep_open = self.exchange(sock, host, path, method)
+        except OSError:
+            if sock is not None:
+                sock.close()
+            if not reused:
+                raise
+            # The server closed our idle connection - retry on a fresh one
+            reused = False
+            sock = self.connect(host, port, use_ssl)
+            response, keep_open = self.exchange(sock, host, path, method)
+        
+        if keep_open:
+            self.connections[key] = sock
+        else:
+            sock.close()
+        
+        return response, reused
+    
+    def close(self):
+        """Close every pooled connection"""
+        for sock in self.connections.values():
+            sock.close()
+        self.connections.clear()
+
 def parse_http_response(response):
     """Parse and display HTTP response"""
     print_section("Parsing HTTP Response")
@@ -163,13 +317,10 @@ def parse_http_response(response):
         return
     
     try:
-        # Decode response
-        response_str = response.decode('utf-8', errors='ignore')
-        
-        # Split headers and body
-        parts = response_str.split('\r\n\r\n', 1)
-        header_section = parts[0]
-        body = parts[1] if len(parts) > 1 else ""
+        # Split headers and body (on raw bytes, before decoding)
+        parts = response.split(b'\r\n\r\n', 1)
+        header_section = parts[0].decode('utf-8', errors='ignore')
+        body = parts[1] if len(parts) > 1 else b""
         
         # Parse status line and headers
         lines = header_section.split('\r\n')
@@ -196,9 +347,9 @@ def parse_http_response(response):
         
         print(f"\nBody Length: {len(body)} bytes")
         if body:
-            print(f"\nBody Preview (first 200 chars):")
+            print(f"\nBody Preview (first 200 bytes):")
             print("-" * 60)
-            print(body[:200])
+            print(body[:200].decode('utf-8', errors='ignore'))
             if len(body) > 200:
                 print("...")
             print("-" * 60)
@@ -206,6 +357,29 @@ def parse_http_response(response):
     except Exception as e:
         print(f"Error parsing response: {e}")
 
+def demonstrate_keep_alive(host, port=80, path="/", use_ssl=False, count=3):
+    """Send several requests over one persistent connection"""
+    print_section(f"Keep-Alive: {count} Requests to {host}:{port}")
+    
+    print("\nThe first request pays for the TCP (and TLS) handshake.")
+    print("Later requests reuse the same connection.\n")
+    
+    client = HttpDemoClient()
+    try:
+        for i in range(1, count + 1):
+            start = time.perf_counter()
+            response, reused = client.request(host, port, path, use_ssl)
+            elapsed = (time.perf_counter() - start) * 1000
+            status_line = response.split(b"\r\n", 1)[0].decode('latin-1')
+            connection = "reused connection" if reused else "new connection"
+            print(f"Request {i}: {status_line} - {elapsed:.1f} ms ({connection})")
+    except Exception as e:
+        print(f"   ✗ Error: {e}")
+    finally:
+        client.close()
+    
+    print("\n💡 Watch it in tcpdump: only one SYN for all the requests")
+
 def compare_http_versions():
     """Compare HTTP versions"""
     print_section("HTTP Versions")
@@ -238,20 +412,7 @@ def demonstrate_http_methods():
     """Show different HTTP methods"""
     print_section("HTTP Methods")
     
-    methods = [
-        ("GET", "Retrieve resource (most common)"),
-        ("POST", "Submit data to server"),
-        ("PUT", "Update/replace resource"),
-        ("DELETE", "Remove resource"),
-        ("HEAD", "Like GET but only headers (no body)"),
-        ("OPTIONS", "Query supported methods"),
-        ("PATCH", "Partial modification"),
-    ]
-    
-    print(f"\n{'Method':<10} {'Description'}")
-    print("-" * 60)
-    for method, desc in methods:
-        print(f"{method:<10} {desc}")
+    print(HTTP_METHODS_TABLE)
     
     print("\n💡 GET and POST are most commonly used")
 
@@ -273,7 +434,7 @@ def main():
     compare_http_versions()
     
     # Part 4: Build request
-    build_http_request("example.com", "/")
+    describe_http_request("example.com", "/")
     
     # Part 5: Send real request
     print("\n" + "="*60)
@@ -285,6 +446,9 @@ def main():
     if response:
         parse_http_response(response)
     
+    # Part 6: Reuse one connection for several requests
+    demonstrate_keep_alive("example.com", 80, "/")
+    
     print_section("Experiments to Try")
     print("""
 1. Capture HTTP with tcpdump:
@@ -17,14 +17,40 @@ EXPERIMENT IDEAS:
 3. Compare with system resolver
 """
 
-from scapy.all import IP, UDP, DNS, DNSQR, DNSRR, sr1
+from scapy.all import IP, UDP, DNS, DNSQR, DNSRR
+import functools
+import random
+import select
+import socket
 import sys
+import time
+
+DNS_RECORD_TYPES = [
+    ("A", "IPv4 address", "example.com → 93.184.216.34"),
+    ("AAAA", "IPv6 address", "example.com → 2606:2800:220:1:..."),
+    ("CNAME", "Canonical name (alias)", "www → example.com"),
+    ("MX", "Mail exchange", "example.com → mail.example.com"),
+    ("NS", "Name server", "example.com → ns1.example.com"),
+    ("TXT", "Text records", "SPF, DKIM, verification"),
+    ("PTR", "Reverse lookup", "1.2.3.4 → host.example.com"),
+    ("SOA", "Start of authority", "Zone information"),
+    ("SRV", "Service", "Service location"),
+]
+
+# The table never changes, so format it once at import time
+DNS_RECORD_TABLE = "\n".join(
+    [f"\n{'Type':<8} {'Description':<25} {'Example'}", "-" * 70]
+    + [f"{rtype:<8} {desc:<25} {example}" for rtype, desc, example in DNS_RECORD_TYPES]
+)
+
+@functools.lru_cache(maxsize=None)
+def render_section(title):
+    """Build a section header (once per title)"""
+    return f"\n{'='*60}\n  {title}\n{'='*60}"
 
 def print_section(title):
     """Pretty print section headers"""
-    print(f"\n{'='*60}")
-    print(f"  {title}")
-    print('='*60)
+    print(render_section(title))
 
 def explain_dns():
     """Explain DNS fundamentals"""
@@ -78,22 +104,7 @@ def show_dns_record_types():
     """Show common DNS record types"""
     print_section("DNS Record Types")
     
-    records = [
-        ("A", "IPv4 address", "example.com → 93.184.216.34"),
-        ("AAAA", "IPv6 address", "example.com → 2606:2800:220:1:..."),
-        ("CNAME", "Canonical name (alias)", "www → example.com"),
-        ("MX", "Mail exchange", "example.com → mail.example.com"),
-        ("NS", "Name server", "example.com → ns1.example.com"),
-        ("TXT", "Text records", "SPF, DKIM, verification"),
-        ("PTR", "Reverse lookup", "1.2.3.4 → host.example.com"),
-        ("SOA", "Start of authority", "Zone information"),
-        ("SRV", "Service", "Service location"),
-    ]
-    
-    print(f"\n{'Type':<8} {'Description':<25} {'Example'}")
-    print("-" * 70)
-    for rtype, desc, example in records:
-        print(f"{rtype:<8} {desc:<25} {example}")
+    print(DNS_RECORD_TABLE)
 
 def build_dns_query(domain, qtype="A"):
     """Build a DNS query packet"""
@@ -132,24 +143,38 @@ def send_dns_query(domain, qtype="A", dns_server="8.8.8.8"):
     """Send DNS query and parse response"""
     print_section(f"Querying {domain} ({qtype}) via {dns_server}")
     
-    # Build query
-    query = IP(dst=dns_server)/UDP(dport=53)/DNS(rd=1, qd=DNSQR(qname=domain, qtype=qtype))
+    # Build query (only the DNS message - the kernel adds IP/UDP headers)
+    query = DNS(id=random.randint(0, 0xFFFF), rd=1, qd=DNSQR(qname=domain, qtype=qtype))
     
     print(f"\n→ Sending query to {dns_server}...")
     
-    # Send and receive
-    response = sr1(query, verbose=0, timeout=5)
-    
-    if response is None:
+    # Send and receive over a regular UDP socket (no root needed)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.settimeout(5)
+    try:
+        sock.connect((dns_server, 53))
+        sock.send(bytes(query))
+        data = sock.recv(4096)
+    except socket.timeout:
         print("✗ No response (timeout)")
         return
+    except OSError as e:
+        # e.g. ICMP port unreachable comes back as ConnectionRefusedError
+        print(f"✗ No response ({e})")
+        return
+    finally:
+        sock.close()
     
-    if not response.haslayer(DNS):
+    # Parse response
+    try:
+        dns_resp = DNS(data)
+    except Exception:
         print("✗ Response is not DNS")
         return
     
-    # Parse response
-    dns_resp = response[DNS]
+    if dns_resp.id != query.id:
+        print("✗ Response does not match our query")
+        return
     
     print(f"✓ Received response!")
     print(f"\nDNS Response:")
@@ -176,21 +201,60 @@ def send_dns_query(domain, qtype="A", dns_server="8.8.8.8"):
     else:
         print(f"\n✗ No answers (domain may not exist)")
     
-    return response
+    return dns_resp
 
-def compare_query_types(domain):
-    """Query different record types"""
+def compare_query_types(domain, dns_server="8.8.8.8", timeout=3):
+    """Query different record types (all in flight at once)"""
     print_section(f"Querying Different Record Types for {domain}")
     
     types = ["A", "AAAA", "MX", "NS", "TXT"]
     
-    for qtype in types:
-        query = IP(dst="8.8.8.8")/UDP(dport=53)/DNS(rd=1, qd=DNSQR(qname=domain, qtype=qtype))
-        response = sr1(query, verbose=0, timeout=3)
+    # Send every query on one UDP socket before waiting for any answer.
+    # Replies are matched back to their query by transaction ID, so the
+    # total wait is the slowest reply instead of the sum of all of them.
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    pending = {}
+    responses = {}
+    failed = {}
+    
+    try:
+        first_id = random.randint(0, 0xFFFF)
+        for i, qtype in enumerate(types):
+            txid = (first_id + i) & 0xFFFF
+            query = DNS(id=txid, rd=1, qd=DNSQR(qname=domain, qtype=qtype))
+            try:
+                sock.sendto(bytes(query), (dns_server, 53))
+            except OSError as e:
+                # e.g. network unreachable or no route to the server
+                failed[qtype] = e
+                continue
+            pending[txid] = qtype
         
+        deadline = time.monotonic() + timeout
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            ready, _, _ = select.select([sock], [], [], remaining)
+            if not ready:
+                break
+            data, _ = sock.recvfrom(4096)
+            try:
+                dns_resp = DNS(data)
+            except Exception:
+                continue
+            qtype = pending.pop(dns_resp.id, None)
+            if qtype is not None:
+                responses[qtype] = dns_resp
+    finally:
+        sock.close()
+    
+    for qtype in types:
         print(f"\n{qtype} Record:")
-        if response and response.haslayer(DNS):
-            dns_resp = response[DNS]
+        dns_resp = responses.get(qtype)
+        if qtype in failed:
+            print(f"  ✗ Query failed ({failed[qtype]})")
+        elif dns_resp is not None:
             if dns_resp.ancount > 0:
                 for i in range(dns_resp.ancount):
                     if dns_resp.an[i]:
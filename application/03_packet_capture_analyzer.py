@@ -10,7 +10,9 @@ You'll learn:
 - Protocol distribution
 - Connection analysis
 
-Run with: python3 03_packet_capture_analyzer.py <file.pcap>
+Run with: python3 03_packet_capture_analyzer.py <file.pcap> [workers|fast]
+  (workers > 1 spreads packet dissection across CPU cores,
+   fast skips Scapy and unpacks the headers with struct)
 
 EXPERIMENT IDEAS:
 1. Analyze different capture files
@@ -18,9 +20,82 @@ EXPERIMENT IDEAS:
 3. Generate traffic statistics
 """
 
-from scapy.all import rdpcap, IP, TCP, UDP, ICMP, ARP, DNS
+from scapy.config import conf
+from scapy.layers.dns import DNS
+from scapy.layers.inet import IP, TCP, UDP, ICMP, IPerror, TCPerror, UDPerror, ICMPerror
+from scapy.layers.inet6 import IPv6
+from scapy.layers.l2 import ARP, CookedLinux, CookedLinuxV2, Dot1Q, Ether, Loopback
+from scapy.packet import Raw
+from scapy.utils import PcapReader, RawPcapReader
+import contextlib
+import io
+import multiprocessing
+import os
 import sys
+import mmap
+import socket
+import struct
 from collections import defaultdict, Counter
+from types import MappingProxyType
+
+# Only dissect the layers this analyzer reports on, the link and network
+# layers that lead to them, and the headers quoted inside ICMP errors
+# (so those are not counted as UDP). TCP and UDP payloads are only
+# decoded further when they are DNS; other TCP data stays Raw (all the
+# HTTP check needs).
+conf.layers.filter([Ether, CookedLinux, CookedLinuxV2, Dot1Q, Loopback,
+                    IP, IPv6, TCP, UDP, ICMP, ARP, DNS, Raw,
+                    IPerror, TCPerror, UDPerror, ICMPerror])
+TCP.payload_guess = [guess for guess in TCP.payload_guess if guess[1] is DNS]
+
+# An HTTP request starts with the method followed by a space
+HTTP_METHODS = (b'GET ', b'POST ', b'PUT ', b'DELETE ', b'HEAD ', b'OPTIONS ')
+
+PORT_SERVICES = MappingProxyType({
+    80: 'HTTP', 443: 'HTTPS', 22: 'SSH', 21: 'FTP',
+    25: 'SMTP', 53: 'DNS', 110: 'POP3', 143: 'IMAP',
+    3306: 'MySQL', 5432: 'PostgreSQL', 6379: 'Redis',
+    8080: 'HTTP-Alt', 3389: 'RDP'
+})
+
+UDP_SERVICES = MappingProxyType({
+    53: 'DNS', 67: 'DHCP-Server', 68: 'DHCP-Client',
+    123: 'NTP', 161: 'SNMP', 514: 'Syslog', 5353: 'mDNS'
+})
+
+FLAG_DESC = MappingProxyType({
+    'S': 'SYN (Connection request)',
+    'SA': 'SYN-ACK (Connection response)',
+    'A': 'ACK (Acknowledgment)',
+    'PA': 'PSH-ACK (Data push)',
+    'F': 'FIN (Close connection)',
+    'FA': 'FIN-ACK (Close + ack)',
+    'R': 'RST (Reset connection)',
+    'RA': 'RST-ACK (Reset + ack)',
+})
+
+# TCP flags are counted as ints; FLAG_STR[value] gives scapy's string
+# for them ('PA' for PSH+ACK), lowest bit first as in str(tcp.flags)
+TCP_FLAG_LETTERS = 'FSRPAUECN'
+FLAG_STR = tuple(
+    ''.join(letter for bit, letter in enumerate(TCP_FLAG_LETTERS) if value >> bit & 1)
+    for value in range(1 << len(TCP_FLAG_LETTERS))
+)
+
+# Classic pcap magic number -> (byte order, timestamp fraction units)
+PCAP_MAGIC = {
+    b'\xd4\xc3\xb2\xa1': ('<', 1e6), b'\xa1\xb2\xc3\xd4': ('>', 1e6),
+    b'\x4d\x3c\xb2\xa1': ('<', 1e9), b'\xa1\xb2\x3c\x4d': ('>', 1e9),
+}
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = (12, 101, 228)
+LINKTYPE_LINUX_SLL = 113
+
+# version/IHL, TOS, length, ID, flags/fragment, TTL, protocol, checksum, src, dst
+IPV4_HEADER = struct.Struct('!BBHHHBBH4s4s')
+UINT16 = struct.Struct('!H')
+TWO_UINT16 = struct.Struct('!HH')
+DNS_PORTS = (53, 5353)
 
 def print_section(title):
     """Pretty print section headers"""
@@ -34,10 +109,15 @@ def analyze_pcap(filename):
     
     try:
         print("\nReading packets...")
-        packets = rdpcap(filename)
-        print(f"✓ Loaded {len(packets)} packets")
+        # PcapReader yields one packet at a time, so memory use does not
+        # grow with the size of the capture
+        with PcapReader(filename) as packets:
+            stats = analyze_all(packets)
+        print(f"✓ Loaded {stats['packet_count']} packets")
         
-        return packets
+        if not stats['packet_count']:
+            return None
+        return stats
     except FileNotFoundError:
         print(f"✗ File not found: {filename}")
         return None
@@ -45,232 +125,555 @@ def analyze_pcap(filename):
         print(f"✗ Error reading file: {e}")
         return None
 
-def basic_statistics(packets):
+def analyze_pcap_parallel(filename, workers=os.cpu_count()):
+    """Analyze a PCAP file using several CPU cores
+
+    Dissecting packets with Scapy is CPU-bound and single-threaded.
+    Here the main process only reads raw records from the file and hands
+    them out in batches; worker processes dissect and count, and their
+    partial results are added together at the end.
+    """
+    print_section(f"Analyzing: {filename}")
+    
+    try:
+        print(f"\nReading packets with {workers} worker processes...")
+        stats = new_stats()
+        # "spawn" starts clean workers instead of forking Scapy's state
+        context = multiprocessing.get_context("spawn")
+        with RawPcapReader(filename) as reader, context.Pool(workers) as pool:
+            # imap keeps batch order, so the merged counters rank ties
+            # exactly like a single-process run
+            for partial in pool.imap(analyze_batch, read_batches(reader)):
+                merge_stats(stats, partial)
+        print(f"✓ Loaded {stats['packet_count']} packets")
+        
+        if not stats['packet_count']:
+            return None
+        return stats
+    except FileNotFoundError:
+        print(f"✗ File not found: {filename}")
+        return None
+    except Exception as e:
+        print(f"✗ Error reading file: {e}")
+        return None
+
+def analyze_pcap_fast(filename):
+    """Analyze a PCAP file by unpacking the headers directly
+
+    For counting we don't need Scapy's packet objects at all: the file
+    is memory-mapped and only the Ethernet, IP, TCP/UDP and DNS header
+    fields the reports use are unpacked with struct. Only classic pcap
+    files with Ethernet, Linux cooked or raw IP frames are supported;
+    anything else falls back to analyze_pcap().
+    """
+    print_section(f"Analyzing: {filename}")
+    
+    try:
+        print("\nReading packets with the header-only parser...")
+        with open(filename, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            stats = count_pcap_records(buf)
+        if stats is None:
+            print("  Not a classic Ethernet/IP pcap, falling back to Scapy")
+            return analyze_pcap(filename)
+        print(f"✓ Loaded {stats['packet_count']} packets")
+        
+        if not stats['packet_count']:
+            return None
+        return stats
+    except FileNotFoundError:
+        print(f"✗ File not found: {filename}")
+        return None
+    except Exception as e:
+        print(f"✗ Error reading file: {e}")
+        return None
+
+def count_pcap_records(buf):
+    """Fill the same statistics as analyze_all() straight from pcap bytes
+
+    Returns None if the file is not a classic pcap with a supported
+    link type. IP addresses are counted as their 4 raw bytes and only
+    turned into dotted strings once, at the end.
+    """
+    if len(buf) < 24 or buf[:4] not in PCAP_MAGIC:
+        return None
+    endian, ticks = PCAP_MAGIC[buf[:4]]
+    linktype = struct.unpack_from(endian + 'I', buf, 20)[0] & 0xFFFF
+    if linktype not in (LINKTYPE_ETHERNET, LINKTYPE_LINUX_SLL) + LINKTYPE_RAW:
+        return None
+    record_header = struct.Struct(endian + 'IIII')
+    
+    stats = new_stats()
+    protocols = stats['protocols']
+    protocol_bytes = stats['protocol_bytes']
+    sources = Counter()
+    destinations = Counter()
+    pairs = Counter()
+    # Ports and flags are counted in flat lists indexed by their value,
+    # which is cheaper than a Counter update. The *_seen lists remember
+    # the order values first appeared in, so ties still rank the same.
+    tcp_ports = [0] * 65536
+    udp_ports = [0] * 65536
+    flag_counts = [0] * len(FLAG_STR)
+    tcp_ports_seen = []
+    udp_ports_seen = []
+    flags_seen = []
+    dns_queries = stats['dns_queries']
+    http_methods = stats['http_methods']
+    packet_count = 0
+    total_bytes = 0
+    dns_responses = 0
+    first_time = last_time = None
+    
+    offset = 24
+    file_end = len(buf)
+    while offset + 16 <= file_end:
+        sec, frac, caplen, _ = record_header.unpack_from(buf, offset)
+        start = offset + 16
+        end = start + caplen
+        if end > file_end:  # last record cut short
+            break
+        offset = end
+        
+        packet_count += 1
+        total_bytes += caplen
+        last_time = sec + frac / ticks
+        if first_time is None:
+            first_time = last_time
+        
+        # Link layer -> EtherType of the network layer
+        ether_type = None
+        if linktype == LINKTYPE_ETHERNET:
+            net = start + 14
+            if net <= end:
+                ether_type = UINT16.unpack_from(buf, start + 12)[0]
+                while ether_type == 0x8100 and net + 4 <= end:  # VLAN tag
+                    ether_type = UINT16.unpack_from(buf, net + 2)[0]
+                    net += 4
+        elif linktype == LINKTYPE_LINUX_SLL:
+            net = start + 16
+            if net <= end:
+                ether_type = UINT16.unpack_from(buf, start + 14)[0]
+        elif caplen:
+            net = start
+            ether_type = {4: 0x0800, 6: 0x86DD}.get(buf[start] >> 4)
+        
+        # Network layer (IP payloads are cut to the IP length, like Scapy)
+        proto = 'Other'
+        ip_proto = None
+        if ether_type == 0x0800 and net + 20 <= end:
+            (version_ihl, _, ip_len, _, frag, _, ip_proto, _,
+             src, dst) = IPV4_HEADER.unpack_from(buf, net)
+            sources[src] += 1
+            destinations[dst] += 1
+            pairs[(src, dst)] += 1
+            l4 = net + (version_ihl & 0x0F) * 4
+            l4_end = min(end, net + ip_len) if ip_len >= l4 - net else end
+            if frag & 0x1FFF:  # later fragments carry no transport header
+                ip_proto = None
+        elif ether_type == 0x86DD and net + 40 <= end:
+            ip_proto = buf[net + 6]
+            l4 = net + 40
+            l4_end = min(end, l4 + UINT16.unpack_from(buf, net + 4)[0])
+            if ip_proto == 1:  # ICMP only exists on IPv4
+                ip_proto = None
+        elif ether_type == 0x0806:
+            proto = 'ARP'
+        
+        # Transport layer
+        dns = None
+        if ip_proto == 6 and l4 + 20 <= l4_end:
+            proto = 'TCP'
+            sport, dport = TWO_UINT16.unpack_from(buf, l4)
+            if not tcp_ports[dport]:
+                tcp_ports_seen.append(dport)
+            tcp_ports[dport] += 1
+            if not tcp_ports[sport]:
+                tcp_ports_seen.append(sport)
+            tcp_ports[sport] += 1
+            offset_flags = UINT16.unpack_from(buf, l4 + 12)[0]
+            flags = offset_flags & 0x1FF
+            if not flag_counts[flags]:
+                flags_seen.append(flags)
+            flag_counts[flags] += 1
+            data = l4 + (offset_flags >> 12) * 4
+            if data < l4_end and (dport == 53 or sport == 53):
+                # DNS over TCP: a 2-byte length, then the message
+                dns = data + 2
+                dns_end = l4_end
+            elif data < l4_end:
+                head = buf[data:min(data + 8, l4_end)]
+                if head.startswith(HTTP_METHODS):
+                    http_methods[head.split(b' ', 1)[0].decode()] += 1
+        elif ip_proto == 17 and l4 + 8 <= l4_end:
+            proto = 'UDP'
+            sport, dport = TWO_UINT16.unpack_from(buf, l4)
+            if not udp_ports[dport]:
+                udp_ports_seen.append(dport)
+            udp_ports[dport] += 1
+            if not udp_ports[sport]:
+                udp_ports_seen.append(sport)
+            udp_ports[sport] += 1
+            if dport in DNS_PORTS or sport in DNS_PORTS:
+                dns = l4 + 8
+                dns_end = min(l4_end, l4 + UINT16.unpack_from(buf, l4 + 4)[0])
+        elif ip_proto == 1 and l4 + 8 <= l4_end:
+            proto = 'ICMP'
+        
+        if dns is not None and dns + 12 <= dns_end:
+            if buf[dns + 2] & 0x80:  # QR bit: response
+                dns_responses += 1
+            elif UINT16.unpack_from(buf, dns + 4)[0]:  # has a question
+                qname = read_qname(buf, dns, dns + 12, dns_end)
+                if qname is not None:
+                    dns_queries[qname] += 1
+        
+        protocols[proto] += 1
+        protocol_bytes[proto] += caplen
+    
+    stats['tcp_ports'].update({port: tcp_ports[port] for port in tcp_ports_seen})
+    stats['udp_ports'].update({port: udp_ports[port] for port in udp_ports_seen})
+    stats['flag_counts'].update({flags: flag_counts[flags] for flags in flags_seen})
+    # Format each address once, keeping first-seen order for ties
+    stats['sources'].update({socket.inet_ntoa(ip): n for ip, n in sources.items()})
+    stats['destinations'].update({socket.inet_ntoa(ip): n for ip, n in destinations.items()})
+    stats['pairs'].update({(socket.inet_ntoa(src), socket.inet_ntoa(dst)): n
+                           for (src, dst), n in pairs.items()})
+    stats['packet_count'] = packet_count
+    stats['total_bytes'] = total_bytes
+    stats['first_time'] = first_time
+    stats['last_time'] = last_time
+    stats['dns_responses'] = dns_responses
+    stats['http_packets'] = sum(http_methods.values())
+    stats['tcp_count'] = protocols['TCP']
+    stats['udp_count'] = protocols['UDP']
+    stats['icmp_count'] = protocols['ICMP']
+    return stats
+
+def read_qname(buf, dns, offset, end):
+    """Read a DNS name as Scapy shows it (b'example.com.')
+
+    Like Scapy, a name cut short by the end of the packet or by a
+    pointer loop keeps the labels read so far, and an empty name is b'.',
+    so non-DNS traffic on the DNS ports is counted the same way. Returns
+    None if there are no question bytes at all.
+    """
+    if offset >= end:
+        return None
+    labels = []
+    jumps = []
+    while offset < end:
+        length = buf[offset]
+        if length & 0xC0:  # compression pointer from the DNS header
+            if offset + 1 >= end:
+                break
+            offset = dns + ((length & 0x3F) << 8 | buf[offset + 1])
+            if offset in jumps or len(jumps) == 20:
+                break
+            jumps.append(offset)
+        elif length:
+            labels.append(buf[offset + 1:min(offset + 1 + length, end)] + b'.')
+            offset += 1 + length
+        else:
+            break
+    return b''.join(labels) or b'.'
+
+def read_batches(reader, batch_size=5000):
+    """Yield lists of (linktype, raw bytes, timestamp) without dissecting"""
+    batch = []
+    for data, meta in reader:
+        if hasattr(meta, 'tshigh'):
+            # pcapng: link type and timestamp are stored per packet
+            linktype = meta.linktype
+            timestamp = ((meta.tshigh << 32) + meta.tslow) / meta.tsresol
+        else:
+            # classic pcap
+            linktype = reader.linktype
+            timestamp = meta.sec + meta.usec / (1e9 if reader.nano else 1e6)
+        batch.append((linktype, data, timestamp))
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def analyze_batch(batch):
+    """Dissect one batch of raw packets and count it (runs in a worker)"""
+    packets = []
+    for linktype, data, timestamp in batch:
+        cls = conf.l2types.num2layer.get(linktype, conf.raw_layer)
+        try:
+            packet = cls(data)
+        except Exception:
+            packet = conf.raw_layer(data)
+        packet.time = timestamp
+        packets.append(packet)
+    return analyze_all(packets)
+
+def merge_stats(total, partial):
+    """Add the statistics of a later batch into the running total"""
+    if total['first_time'] is None:
+        total['first_time'] = partial['first_time']
+    if partial['last_time'] is not None:
+        total['last_time'] = partial['last_time']
+    
+    for key in ('packet_count', 'total_bytes', 'dns_responses',
+                'http_packets', 'tcp_count', 'udp_count', 'icmp_count'):
+        total[key] += partial[key]
+    
+    for key in ('protocols', 'protocol_bytes', 'sources', 'destinations',
+                'pairs', 'tcp_ports', 'udp_ports', 'flag_counts',
+                'dns_queries', 'http_methods'):
+        for item, count in partial[key].items():
+            total[key][item] += count
+
+def new_stats():
+    """Empty statistics, filled in by analyze_all()"""
+    return {
+        'packet_count': 0,
+        'first_time': None,
+        'last_time': None,
+        'total_bytes': 0,
+        'protocols': Counter(),
+        'protocol_bytes': defaultdict(int),
+        'sources': Counter(),
+        'destinations': Counter(),
+        'pairs': Counter(),
+        'tcp_ports': Counter(),
+        'udp_ports': Counter(),
+        'flag_counts': Counter(),  # int flag bits -> count
+        'dns_queries': Counter(),  # raw qname bytes -> count
+        'dns_responses': 0,
+        'http_packets': 0,
+        'http_methods': Counter(),
+        'tcp_count': 0,
+        'udp_count': 0,
+        'icmp_count': 0,
+    }
+
+def layers(packet):
+    """Look up every layer the analyzer uses, once (None if absent)"""
+    return (packet.getlayer(IP), packet.getlayer(TCP), packet.getlayer(UDP),
+            packet.getlayer(ICMP), packet.getlayer(ARP), packet.getlayer(DNS),
+            packet.getlayer(Raw))
+
+# Counters that analyze_all() first collects as plain lists of keys and
+# then counts in bulk with Counter.update(), every PENDING_LIMIT packets
+PENDING_COUNTERS = ('sources', 'destinations', 'pairs', 'tcp_ports',
+                    'udp_ports', 'flag_counts', 'dns_queries')
+PENDING_LIMIT = 100000
+
+def flush_pending(stats, pending):
+    """Count the collected keys into the stats Counters and empty the lists"""
+    for key, items in pending.items():
+        stats[key].update(items)
+        items.clear()
+
+def analyze_all(packets):
+    """Walk the packets once and collect every statistic
+
+    Each layer is looked up once per packet and shared by all the
+    counters, instead of every report re-walking the whole capture.
+    The report functions below only format what this returns.
+    """
+    stats = new_stats()
+    # Running totals stay in plain locals; stats is filled in at the end
+    packet_count = 0
+    total_bytes = 0
+    first_time = last_time = None
+    # list.append() is cheaper per packet than Counter[key] += 1, and
+    # Counter.update() counts a whole list in C
+    pending = {key: [] for key in PENDING_COUNTERS}
+    add_source = pending['sources'].append
+    add_destination = pending['destinations'].append
+    add_pair = pending['pairs'].append
+    add_tcp_port = pending['tcp_ports'].append
+    add_udp_port = pending['udp_ports'].append
+    add_flags = pending['flag_counts'].append
+    add_dns_query = pending['dns_queries'].append
+    
+    for packet in packets:
+        size = len(packet)
+        ip, tcp, udp, icmp, arp, dns, raw = layers(packet)
+        
+        packet_count += 1
+        total_bytes += size
+        last_time = packet.time
+        if first_time is None:
+            first_time = last_time
+        if packet_count % PENDING_LIMIT == 0:
+            flush_pending(stats, pending)
+        
+        # Protocol distribution (first match wins)
+        if tcp is not None:
+            proto = 'TCP'
+        elif udp is not None:
+            proto = 'UDP'
+        elif icmp is not None:
+            proto = 'ICMP'
+        elif arp is not None:
+            proto = 'ARP'
+        else:
+            proto = 'Other'
+        stats['protocols'][proto] += 1
+        stats['protocol_bytes'][proto] += size
+        
+        # IP conversations
+        if ip is not None:
+            src = ip.src
+            dst = ip.dst
+            add_source(src)
+            add_destination(dst)
+            add_pair((src, dst))
+        
+        # Ports and TCP flags
+        if tcp is not None:
+            stats['tcp_count'] += 1
+            add_tcp_port(tcp.dport)
+            add_tcp_port(tcp.sport)
+            add_flags(int(tcp.flags))
+        elif udp is not None:
+            add_udp_port(udp.dport)
+            add_udp_port(udp.sport)
+        if udp is not None:
+            stats['udp_count'] += 1
+        if icmp is not None:
+            stats['icmp_count'] += 1
+        
+        # DNS
+        if dns is not None:
+            if dns.qr == 0:  # Query
+                if dns.qd:
+                    add_dns_query(dns.qd.qname)
+            else:  # Response
+                stats['dns_responses'] += 1
+        
+        # HTTP requests
+        if tcp is not None and raw is not None:
+            # One prefix test against all methods, on the raw bytes
+            payload = raw.load
+            if payload.startswith(HTTP_METHODS):
+                method = payload.split(b' ', 1)[0].decode()
+                stats['http_packets'] += 1
+                stats['http_methods'][method] += 1
+    
+    flush_pending(stats, pending)
+    stats['packet_count'] = packet_count
+    stats['total_bytes'] = total_bytes
+    stats['first_time'] = first_time
+    stats['last_time'] = last_time
+    return stats
+
+def basic_statistics(stats):
     """Generate basic statistics"""
     print_section("Basic Statistics")
     
-    if not packets:
-        return
-    
     # Time range
-    first_time = packets[0].time
-    last_time = packets[-1].time
-    duration = last_time - first_time
+    duration = stats['last_time'] - stats['first_time']
     
     # Size statistics
-    total_bytes = sum(len(p) for p in packets)
-    avg_size = total_bytes / len(packets) if packets else 0
+    packet_count = stats['packet_count']
+    total_bytes = stats['total_bytes']
+    avg_size = total_bytes / packet_count if packet_count else 0
     
     print(f"\nCapture Duration: {duration:.2f} seconds")
-    print(f"Total Packets: {len(packets)}")
+    print(f"Total Packets: {packet_count}")
     print(f"Total Bytes: {total_bytes:,} ({total_bytes/1024/1024:.2f} MB)")
     print(f"Average Packet Size: {avg_size:.1f} bytes")
-    print(f"Packets per Second: {len(packets)/duration:.1f}" if duration > 0 else "N/A")
+    print(f"Packets per Second: {packet_count/duration:.1f}" if duration > 0 else "N/A")
     print(f"Throughput: {(total_bytes*8/duration/1000000):.2f} Mbps" if duration > 0 else "N/A")
 
-def protocol_distribution(packets):
+def protocol_distribution(stats):
     """Analyze protocol distribution"""
     print_section("Protocol Distribution")
     
-    if not packets:
-        return
-    
-    protocols = Counter()
-    protocol_bytes = defaultdict(int)
-    
-    for packet in packets:
-        if packet.haslayer(TCP):
-            protocols['TCP'] += 1
-            protocol_bytes['TCP'] += len(packet)
-        elif packet.haslayer(UDP):
-            protocols['UDP'] += 1
-            protocol_bytes['UDP'] += len(packet)
-        elif packet.haslayer(ICMP):
-            protocols['ICMP'] += 1
-            protocol_bytes['ICMP'] += len(packet)
-        elif packet.haslayer(ARP):
-            protocols['ARP'] += 1
-            protocol_bytes['ARP'] += len(packet)
-        else:
-            protocols['Other'] += 1
-            protocol_bytes['Other'] += len(packet)
+    protocols = stats['protocols']
+    protocol_bytes = stats['protocol_bytes']
     
     print(f"\n{'Protocol':<15} {'Packets':<15} {'Percentage':<15} {'Bytes'}")
     print("-" * 70)
     
     for proto in ['TCP', 'UDP', 'ICMP', 'ARP', 'Other']:
         if protocols[proto] > 0:
-            pct = (protocols[proto] / len(packets)) * 100
+            pct = (protocols[proto] / stats['packet_count']) * 100
             print(f"{proto:<15} {protocols[proto]:<15} {pct:>6.2f}%        {protocol_bytes[proto]:,}")
 
-def analyze_ip_addresses(packets):
+def analyze_ip_addresses(stats):
     """Analyze IP address communication"""
     print_section("IP Address Communication")
     
-    if not packets:
-        return
-    
-    sources = Counter()
-    destinations = Counter()
-    pairs = Counter()
-    
-    for packet in packets:
-        if packet.haslayer(IP):
-            src = packet[IP].src
-            dst = packet[IP].dst
-            sources[src] += 1
-            destinations[dst] += 1
-            pairs[(src, dst)] += 1
-    
     print("\nTop 10 Source IPs:")
     print(f"{'IP Address':<20} {'Packets'}")
     print("-" * 35)
-    for ip, count in sources.most_common(10):
+    for ip, count in stats['sources'].most_common(10):
         print(f"{ip:<20} {count}")
     
     print("\n\nTop 10 Destination IPs:")
     print(f"{'IP Address':<20} {'Packets'}")
     print("-" * 35)
-    for ip, count in destinations.most_common(10):
+    for ip, count in stats['destinations'].most_common(10):
         print(f"{ip:<20} {count}")
     
     print("\n\nTop 10 IP Pairs (Conversations):")
     print(f"{'Source':<20} {'Destination':<20} {'Packets'}")
     print("-" * 65)
-    for (src, dst), count in pairs.most_common(10):
+    for (src, dst), count in stats['pairs'].most_common(10):
         print(f"{src:<20} {dst:<20} {count}")
 
-def analyze_ports(packets):
+def analyze_ports(stats):
     """Analyze port usage"""
     print_section("Port Analysis")
     
-    if not packets:
-        return
-    
-    tcp_ports = Counter()
-    udp_ports = Counter()
-    
-    for packet in packets:
-        if packet.haslayer(TCP):
-            tcp_ports[packet[TCP].dport] += 1
-            tcp_ports[packet[TCP].sport] += 1
-        elif packet.haslayer(UDP):
-            udp_ports[packet[UDP].dport] += 1
-            udp_ports[packet[UDP].sport] += 1
-    
     print("\nTop 10 TCP Ports:")
     print(f"{'Port':<10} {'Packets':<15} {'Common Service'}")
     print("-" * 50)
-    port_services = {
-        80: 'HTTP', 443: 'HTTPS', 22: 'SSH', 21: 'FTP',
-        25: 'SMTP', 53: 'DNS', 110: 'POP3', 143: 'IMAP',
-        3306: 'MySQL', 5432: 'PostgreSQL', 6379: 'Redis',
-        8080: 'HTTP-Alt', 3389: 'RDP'
-    }
-    for port, count in tcp_ports.most_common(10):
-        service = port_services.get(port, '')
+    for port, count in stats['tcp_ports'].most_common(10):
+        service = PORT_SERVICES.get(port, '')
         print(f"{port:<10} {count:<15} {service}")
     
     print("\n\nTop 10 UDP Ports:")
     print(f"{'Port':<10} {'Packets':<15} {'Common Service'}")
     print("-" * 50)
-    udp_services = {
-        53: 'DNS', 67: 'DHCP-Server', 68: 'DHCP-Client',
-        123: 'NTP', 161: 'SNMP', 514: 'Syslog', 5353: 'mDNS'
-    }
-    for port, count in udp_ports.most_common(10):
-        service = udp_services.get(port, '')
+    for port, count in stats['udp_ports'].most_common(10):
+        service = UDP_SERVICES.get(port, '')
         print(f"{port:<10} {count:<15} {service}")
 
-def analyze_tcp_flags(packets):
+def analyze_tcp_flags(stats):
     """Analyze TCP flags"""
     print_section("TCP Flag Analysis")
     
-    if not packets:
-        return
-    
-    flag_counts = Counter()
-    
-    for packet in packets:
-        if packet.haslayer(TCP):
-            flags = packet[TCP].flags
-            flag_str = str(flags)
-            flag_counts[flag_str] += 1
-    
     print(f"\n{'Flags':<10} {'Count':<15} {'Description'}")
     print("-" * 55)
     
-    flag_desc = {
-        'S': 'SYN (Connection request)',
-        'SA': 'SYN-ACK (Connection response)',
-        'A': 'ACK (Acknowledgment)',
-        'PA': 'PSH-ACK (Data push)',
-        'F': 'FIN (Close connection)',
-        'FA': 'FIN-ACK (Close + ack)',
-        'R': 'RST (Reset connection)',
-        'RA': 'RST-ACK (Reset + ack)',
-    }
-    
-    for flags, count in flag_counts.most_common():
-        desc = flag_desc.get(flags, '')
+    for value, count in stats['flag_counts'].most_common():
+        flags = FLAG_STR[value]
+        desc = FLAG_DESC.get(flags, '')
         print(f"{flags:<10} {count:<15} {desc}")
 
-def analyze_dns(packets):
+def analyze_dns(stats):
     """Analyze DNS queries"""
     print_section("DNS Analysis")
     
-    if not packets:
-        return
-    
-    queries = []
-    responses = []
-    
-    for packet in packets:
-        if packet.haslayer(DNS):
-            dns = packet[DNS]
-            if dns.qr == 0:  # Query
-                if dns.qd:
-                    queries.append(dns.qd.qname.decode())
-            else:  # Response
-                responses.append(dns)
+    queries = stats['dns_queries']
     
-    print(f"\nTotal DNS Queries: {len(queries)}")
-    print(f"Total DNS Responses: {len(responses)}")
+    print(f"\nTotal DNS Queries: {sum(queries.values())}")
+    print(f"Total DNS Responses: {stats['dns_responses']}")
     
     if queries:
         print("\nTop 10 Queried Domains:")
-        query_counter = Counter(queries)
         print(f"{'Domain':<40} {'Count'}")
         print("-" * 55)
-        for domain, count in query_counter.most_common(10):
-            print(f"{domain:<40} {count}")
+        # Names are counted as raw bytes; only the top 10 get decoded
+        for qname, count in queries.most_common(10):
+            print(f"{qname.decode():<40} {count}")
 
-def analyze_http(packets):
+def analyze_http(stats):
     """Analyze HTTP traffic"""
     print_section("HTTP Analysis")
     
-    if not packets:
-        return
-    
-    http_packets = 0
-    methods = Counter()
+    methods = stats['http_methods']
     
-    for packet in packets:
-        if packet.haslayer(TCP) and packet.haslayer('Raw'):
-            try:
-                payload = bytes(packet['Raw'].load)
-                payload_str = payload.decode('utf-8', errors='ignore')
-                
-                # Check for HTTP methods
-                for method in ['GET', 'POST', 'PUT', 'DELETE', 'HEAD', 'OPTIONS']:
-                    if payload_str.startswith(method):
-                        http_packets += 1
-                        methods[method] += 1
-                        break
-            except:
-                pass
-    
-    print(f"\nHTTP Packets: {http_packets}")
+    print(f"\nHTTP Packets: {stats['http_packets']}")
     
     if methods:
         print("\nHTTP Methods:")
@@ -279,29 +682,23 @@ def analyze_http(packets):
         for method, count in methods.most_common():
             print(f"{method:<15} {count}")
 
-def generate_summary(packets):
+def generate_summary(stats):
     """Generate overall summary"""
     print_section("Summary")
     
-    if not packets:
-        return
-    
-    tcp_count = sum(1 for p in packets if p.haslayer(TCP))
-    udp_count = sum(1 for p in packets if p.haslayer(UDP))
-    icmp_count = sum(1 for p in packets if p.haslayer(ICMP))
-    
-    unique_ips = set()
-    for p in packets:
-        if p.haslayer(IP):
-            unique_ips.add(p[IP].src)
-            unique_ips.add(p[IP].dst)
+    packet_count = stats['packet_count']
+    tcp_count = stats['tcp_count']
+    udp_count = stats['udp_count']
+    icmp_count = stats['icmp_count']
+    # Every address seen already has a sources or destinations entry
+    unique_ips = stats['sources'].keys() | stats['destinations'].keys()
     
     print(f"""
 Capture Summary:
-- Total Packets: {len(packets)}
-- TCP Packets: {tcp_count} ({tcp_count/len(packets)*100:.1f}%)
-- UDP Packets: {udp_count} ({udp_count/len(packets)*100:.1f}%)
-- ICMP Packets: {icmp_count} ({icmp_count/len(packets)*100:.1f}%)
+- Total Packets: {packet_count}
+- TCP Packets: {tcp_count} ({tcp_count/packet_count*100:.1f}%)
+- UDP Packets: {udp_count} ({udp_count/packet_count*100:.1f}%)
+- ICMP Packets: {icmp_count} ({icmp_count/packet_count*100:.1f}%)
 - Unique IP Addresses: {len(unique_ips)}
     """)
 
@@ -333,6 +730,11 @@ To create packet captures for analysis:
 
 Then analyze:
    python3 03_packet_capture_analyzer.py capture.pcap
+
+Large capture? Use several CPU cores:
+   python3 03_packet_capture_analyzer.py capture.pcap 4
+Or only unpack the headers the reports need, without Scapy:
+   python3 03_packet_capture_analyzer.py capture.pcap fast
     """)
 
 def main():
@@ -342,25 +744,41 @@ def main():
     print("="*60)
     
     if len(sys.argv) < 2:
-        print("\nUsage: python3 03_packet_capture_analyzer.py <file.pcap>")
+        print("\nUsage: python3 03_packet_capture_analyzer.py <file.pcap> [workers|fast]")
         create_sample_capture()
         return
     
     filename = sys.argv[1]
-    packets = analyze_pcap(filename)
-    
-    if packets:
-        basic_statistics(packets)
-        protocol_distribution(packets)
-        analyze_ip_addresses(packets)
-        analyze_ports(packets)
-        analyze_tcp_flags(packets)
-        analyze_dns(packets)
-        analyze_http(packets)
-        generate_summary(packets)
-        
-        print_section("Next Steps")
-        print("""
+    mode = sys.argv[2] if len(sys.argv) > 2 else '1'
+    
+    if mode != 'fast' and not mode.isdigit():
+        print("\nUsage: python3 03_packet_capture_analyzer.py <file.pcap> [workers|fast]")
+        return
+    
+    if mode == 'fast':
+        stats = analyze_pcap_fast(filename)
+    elif int(mode) > 1:
+        stats = analyze_pcap_parallel(filename, int(mode))
+    else:
+        stats = analyze_pcap(filename)
+    
+    if stats:
+        # Build the whole report in memory and write it out in one go,
+        # instead of hundreds of small writes to the terminal or pipe
+        report = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(report):
+                basic_statistics(stats)
+                protocol_distribution(stats)
+                analyze_ip_addresses(stats)
+                analyze_ports(stats)
+                analyze_tcp_flags(stats)
+                analyze_dns(stats)
+                analyze_http(stats)
+                generate_summary(stats)
+                
+                print_section("Next Steps")
+                print("""
 Additional analysis ideas:
 1. Open in Wireshark for visual analysis
 2. Filter specific conversations
@@ -368,6 +786,8 @@ Additional analysis ideas:
 4. Analyze timing and latency
 5. Look for anomalies or attacks
         """)
+        finally:
+            sys.stdout.write(report.getvalue())
     
     print("\n✅ Analysis complete!\n")
 
@@ -17,8 +17,29 @@ EXPERIMENT IDEAS:
 3. Try different Ethernet types
 """
 
-from scapy.all import Ether, ARP, srp, get_if_hwaddr, conf
+# Scapy takes a while to load, so it is imported inside the functions
+# that build packets; the explanations print without waiting for it.
+import functools
+import ipaddress
 import netifaces
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# ARP opcode 2 (reply), as a BPF filter the kernel can apply
+ARP_REPLY_FILTER = "arp[6:2] = 2"
+
+# Interface of the default route, read once when the script starts
+try:
+    DEFAULT_IFACE = netifaces.gateways()['default'][netifaces.AF_INET][1]
+except Exception:
+    DEFAULT_IFACE = None
+
+# Its MAC address, also from netifaces so no Scapy lookup is needed
+try:
+    DEFAULT_MAC = netifaces.ifaddresses(DEFAULT_IFACE)[netifaces.AF_LINK][0]['addr']
+except Exception:
+    DEFAULT_MAC = None
 
 def print_section(title):
     """Pretty print section headers"""
@@ -26,21 +47,64 @@ def print_section(title):
     print(f"  {title}")
     print('='*60)
 
+@functools.lru_cache(maxsize=1)
 def get_default_interface():
-    """Get the default network interface"""
-    try:
-        gateways = netifaces.gateways()
-        default_iface = gateways['default'][netifaces.AF_INET][1]
-        return default_iface
-    except:
-        return conf.iface
+    """Get the default network interface (looked up once per run)"""
+    if DEFAULT_IFACE:
+        return DEFAULT_IFACE
+    from scapy.all import conf
+    return conf.iface
+
+@functools.lru_cache(maxsize=1)
+def broadcast_ether():
+    """Broadcast Ethernet header, built once; copy it (or use /) before changing it"""
+    from scapy.all import Ether
+    return Ether(dst="ff:ff:ff:ff:ff:ff")
+
+def scan_subnet(ip, netmask):
+    """Subnet of ip/netmask to ARP-scan: the real subnet, but at most a /24
+    so a scan stays at 254 addresses"""
+    interface = ipaddress.ip_interface(f"{ip}/{netmask}")
+    if interface.network.prefixlen < 24:
+        return ipaddress.ip_network(f"{ip}/24", strict=False)
+    return interface.network
+
+def get_scan_targets():
+    """List (iface, network) for every interface with an IPv4 address
+
+    The default interface comes first. Loopback is skipped, since nothing
+    on it answers ARP, and so are addresses without a netmask (e.g. some
+    point-to-point and tunnel interfaces).
+    """
+    targets = []
+    for iface in netifaces.interfaces():
+        for ip_info in netifaces.ifaddresses(iface).get(netifaces.AF_INET, []):
+            netmask = ip_info.get('netmask')
+            if not netmask or ipaddress.ip_address(ip_info['addr']).is_loopback:
+                continue
+            network = scan_subnet(ip_info['addr'], netmask)
+            targets.append((iface, str(network)))
+    targets.sort(key=lambda target: target[0] != DEFAULT_IFACE)
+    return targets
+
+@functools.lru_cache(maxsize=8)
+def get_mac_address(iface):
+    """Get the MAC address of an interface (looked up once per interface)
+
+    If an interface's address changes while the script runs, call
+    get_mac_address.cache_clear() to look it up again.
+    """
+    if iface == DEFAULT_IFACE and DEFAULT_MAC:
+        return DEFAULT_MAC
+    from scapy.all import get_if_hwaddr
+    return get_if_hwaddr(iface)
 
 def display_mac_address_info():
     """Display information about MAC addresses"""
     print_section("MAC Address Fundamentals")
     
     iface = get_default_interface()
-    mac = get_if_hwaddr(iface)
+    mac = get_mac_address(iface)
     
     print(f"Your interface: {iface}")
     print(f"Your MAC address: {mac}")
@@ -55,7 +119,9 @@ def create_ethernet_frame():
     print_section("Creating an Ethernet Frame")
     
     # Create a basic Ethernet frame with ARP payload
-    frame = Ether(dst="ff:ff:ff:ff:ff:ff", src=get_if_hwaddr(get_default_interface()))
+    src_mac = get_mac_address(get_default_interface())
+    frame = broadcast_ether().copy()
+    frame.src = src_mac
     
     print("\nEthernet Frame Structure:")
     print(frame.show(dump=True))
@@ -74,36 +140,23 @@ def scan_local_network():
     """Scan local network to see MAC addresses in action"""
     print_section("Live MAC Address Discovery (ARP Scan)")
     
-    iface = get_default_interface()
-    
     # Get local IP range
     try:
-        addrs = netifaces.ifaddresses(iface)
-        ip_info = addrs[netifaces.AF_INET][0]
-        ip = ip_info['addr']
-        netmask = ip_info['netmask']
-        
-        # Simple /24 network assumption
-        network = '.'.join(ip.split('.')[:-1]) + '.0/24'
-        
-        print(f"\nScanning network: {network}")
-        print(f"Interface: {iface}")
+        targets = get_scan_targets()
+        for iface, network in targets:
+            print(f"\nScanning network: {network}")
+            print(f"Interface: {iface}")
         print("\nThis may take a few seconds...\n")
         
-        # Create ARP request
-        arp = ARP(pdst=network)
-        ether = Ether(dst="ff:ff:ff:ff:ff:ff")
-        packet = ether/arp
-        
-        # Send and receive responses
-        result = srp(packet, timeout=3, iface=iface, verbose=0)[0]
+        # Broadcast an ARP request to every address and collect replies
+        devices = arp_scan_all(targets, timeout=3)
         
-        print(f"Found {len(result)} devices:\n")
+        print(f"Found {len(devices)} devices:\n")
         print(f"{'IP Address':<20} {'MAC Address':<20} {'Description'}")
         print("-" * 60)
         
-        for sent, received in result:
-            print(f"{received.psrc:<20} {received.hwsrc:<20} {'Live device'}")
+        for ip, mac, iface in devices:
+            print(f"{ip:<20} {mac:<20} {'Live device'} ({iface})")
             
         print("\n💡 Observation: Each device has a unique MAC address!")
         print("💡 ARP (Address Resolution Protocol) maps IP → MAC addresses")
@@ -112,8 +165,93 @@ def scan_local_network():
         print(f"Scan error: {e}")
         print("You may need to run with sudo or adjust network interface")
 
+def enable_libpcap():
+    """Capture through libpcap if it is installed (e.g. libpcap0.8 on Debian)
+
+    libpcap hands over packets in batches and loses fewer of a burst of
+    ARP replies. The setting swaps Scapy's global socket classes, so call
+    this once from main() before any scan thread starts.
+    """
+    from scapy.all import conf
+    # Scapy turns this back off (with a warning) if libpcap can't be loaded
+    conf.use_pcap = True
+    return conf.use_pcap
+
+def arp_scan(network, iface, timeout=3):
+    """ARP-scan a subnet and return (ip, mac) pairs in the order they replied
+
+    Instead of srp(), which keeps every request to match answers against,
+    a background sniffer collects ARP replies while all requests go out
+    in a single sendp() call. Where libpcap can compile it, a BPF filter
+    makes the kernel drop everything except ARP replies.
+    """
+    from scapy.all import ARP, AsyncSniffer, sendp
+    from scapy.arch.common import compile_filter
+    from scapy.error import Scapy_Exception
+    
+    try:
+        compile_filter(ARP_REPLY_FILTER)
+        sniff_filter = {'filter': ARP_REPLY_FILTER}
+    except (ImportError, Scapy_Exception):
+        # No libpcap/tcpdump to compile BPF: filter in Python instead
+        sniff_filter = {'lfilter': lambda packet: ARP in packet and packet[ARP].op == 2}
+    targets = [str(host) for host in ipaddress.ip_network(network).hosts()]
+    wanted = set(targets)
+    devices = {}
+    
+    def record(reply):
+        # Keep only (ip, mac) as replies arrive; the packets are not stored
+        if reply[ARP].psrc in wanted:
+            devices.setdefault(reply[ARP].psrc, reply[ARP].hwsrc)
+    
+    started = threading.Event()
+    sniffer = AsyncSniffer(iface=iface, prn=record, store=False,
+                           started_callback=started.set, **sniff_filter)
+    sniffer.start()
+    started.wait(timeout)
+    
+    ether = broadcast_ether()
+    sendp((ether/ARP(pdst=ip) for ip in targets),
+          iface=iface, verbose=0)
+    time.sleep(timeout)
+    sniffer.stop()
+    return list(devices.items())
+
+def arp_scan_all(targets, timeout=3):
+    """ARP-scan several (iface, network) pairs at once and return (ip, mac, iface)
+
+    A scan spends nearly all its time waiting for replies, so each one
+    runs in its own thread and all of them finish in about one timeout.
+    An interface that can't be scanned (down, gone, not Ethernet) is
+    reported and skipped; if every scan fails, the first error is raised.
+    """
+    if not targets:
+        return []
+    
+    def scan_one(target):
+        iface, network = target
+        try:
+            return arp_scan(network, iface, timeout), None
+        except Exception as e:
+            return [], e
+    
+    with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+        results = list(pool.map(scan_one, targets))
+    
+    errors = [error for found, error in results if error is not None]
+    if len(errors) == len(targets):
+        raise errors[0]
+    
+    devices = []
+    for (iface, network), (found, error) in zip(targets, results):
+        if error is not None:
+            print(f"⚠️  Could not scan {network} on {iface}: {error}")
+        devices.extend((ip, mac, iface) for ip, mac in found)
+    return devices
+
 def demonstrate_frame_analysis():
     """Show how to analyze Ethernet frames"""
+    from scapy.all import ARP, Ether
     print_section("Ethernet Frame Analysis")
     
     # Create a sample frame with payload
@@ -151,6 +289,7 @@ def main():
     
     # Part 4: Live network scan
     try:
+        enable_libpcap()
         scan_local_network()
     except PermissionError:
         print_section("Network Scan")
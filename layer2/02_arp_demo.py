@@ -17,10 +17,25 @@ EXPERIMENT IDEAS:
 3. Send gratuitous ARP packets
 """
 
-from scapy.all import ARP, Ether, srp, send, sniff, conf
+# Scapy takes a while to load, so it is imported inside the functions
+# that build packets; the explanations print without waiting for it.
+import functools
+import ipaddress
 import netifaces
 import subprocess
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+# ARP opcode 2 (reply), as a BPF filter the kernel can apply
+ARP_REPLY_FILTER = "arp[6:2] = 2"
+
+# Interface of the default route, read once when the script starts
+try:
+    DEFAULT_IFACE = netifaces.gateways()['default'][netifaces.AF_INET][1]
+except Exception:
+    DEFAULT_IFACE = None
 
 def print_section(title):
     """Pretty print section headers"""
@@ -28,14 +43,57 @@ def print_section(title):
     print(f"  {title}")
     print('='*60)
 
-def get_default_interface():
-    """Get the default network interface"""
-    try:
-        gateways = netifaces.gateways()
-        default_iface = gateways['default'][netifaces.AF_INET][1]
-        return default_iface
-    except:
-        return conf.iface
+@functools.lru_cache(maxsize=1)
+def broadcast_ether():
+    """Broadcast Ethernet header, built once; copy it (or use /) before changing it"""
+    from scapy.all import Ether
+    return Ether(dst="ff:ff:ff:ff:ff:ff")
+
+def scan_subnet(ip, netmask):
+    """Subnet of ip/netmask to ARP-scan: the real subnet, but at most a /24
+    so a scan stays at 254 addresses"""
+    interface = ipaddress.ip_interface(f"{ip}/{netmask}")
+    if interface.network.prefixlen < 24:
+        return ipaddress.ip_network(f"{ip}/24", strict=False)
+    return interface.network
+
+def get_scan_targets():
+    """List (iface, network) for every interface with an IPv4 address
+
+    The default interface comes first. Loopback is skipped, since nothing
+    on it answers ARP, and so are addresses without a netmask (e.g. some
+    point-to-point and tunnel interfaces).
+    """
+    targets = []
+    for iface in netifaces.interfaces():
+        for ip_info in netifaces.ifaddresses(iface).get(netifaces.AF_INET, []):
+            netmask = ip_info.get('netmask')
+            if not netmask or ipaddress.ip_address(ip_info['addr']).is_loopback:
+                continue
+            network = scan_subnet(ip_info['addr'], netmask)
+            targets.append((iface, str(network)))
+    targets.sort(key=lambda target: target[0] != DEFAULT_IFACE)
+    return targets
+
+@functools.lru_cache(maxsize=1)
+def get_network_info():
+    """Read everything the live demos need about the network in one go
+
+    Returns a dict with the default route's iface, ip, netmask, mac and
+    gateway, plus targets, the (iface, network) pairs to ARP-scan.
+    main() reads it once and passes it to the live demos.
+    """
+    gateway, iface = netifaces.gateways()['default'][netifaces.AF_INET][:2]
+    addresses = netifaces.ifaddresses(iface)
+    ip_info = addresses[netifaces.AF_INET][0]
+    return {
+        'iface': iface,
+        'ip': ip_info['addr'],
+        'netmask': ip_info['netmask'],
+        'mac': addresses[netifaces.AF_LINK][0]['addr'],
+        'gateway': gateway,
+        'targets': get_scan_targets(),
+    }
 
 def display_arp_theory():
     """Explain ARP concepts"""
@@ -63,19 +121,25 @@ def show_system_arp_cache():
     print("\nYour system maintains an ARP cache (IP → MAC mappings):\n")
     
     try:
-        result = subprocess.run(['arp', '-n'], capture_output=True, text=True)
-        print(result.stdout)
+        if sys.platform.startswith('linux'):
+            # The kernel exposes the ARP table directly; no need to run arp
+            with open('/proc/net/arp') as f:
+                print(f.read())
+        else:
+            result = subprocess.run(['arp', '-n'], capture_output=True, text=True)
+            print(result.stdout)
         print("\n💡 These mappings are learned via ARP and cached temporarily")
     except:
         print("Could not read ARP cache. Try: arp -n")
 
 def build_arp_request(target_ip):
     """Build and display an ARP request packet"""
+    from scapy.all import ARP
     print_section(f"Building ARP Request for {target_ip}")
     
     # Create ARP request
     arp = ARP(pdst=target_ip)
-    ether = Ether(dst="ff:ff:ff:ff:ff:ff")
+    ether = broadcast_ether().copy()
     packet = ether/arp
     
     print("\nARP Request Packet Structure:")
@@ -92,17 +156,20 @@ def build_arp_request(target_ip):
     
     return packet
 
-def send_arp_request(target_ip):
+def send_arp_request(info, target_ip):
     """Send an ARP request and capture the reply"""
+    from scapy.all import ARP, srp
     print_section(f"Sending ARP Request to {target_ip}")
     
-    iface = get_default_interface()
+    iface = info['iface']
     print(f"\nInterface: {iface}")
     print(f"Sending ARP request...")
     
-    # Create and send ARP request
-    arp = ARP(pdst=target_ip)
-    ether = Ether(dst="ff:ff:ff:ff:ff:ff")
+    # Create and send ARP request; our addresses are already known, so
+    # Scapy doesn't have to look them up from the routing table
+    arp = ARP(pdst=target_ip, psrc=info['ip'], hwsrc=info['mac'])
+    ether = broadcast_ether().copy()
+    ether.src = info['mac']
     packet = ether/arp
     
     # Send and wait for reply
@@ -128,6 +195,7 @@ def send_arp_request(target_ip):
 
 def demonstrate_arp_types():
     """Show different types of ARP packets"""
+    from scapy.all import ARP
     print_section("Types of ARP Packets")
     
     print("\n1. ARP REQUEST (op=1):")
@@ -145,36 +213,111 @@ def demonstrate_arp_types():
     grat = ARP(op=2, psrc="192.168.1.100", pdst="192.168.1.100")
     print(grat.show(dump=True))
 
-def scan_network_with_arp():
+def enable_libpcap():
+    """Capture through libpcap if it is installed (e.g. libpcap0.8 on Debian)
+
+    libpcap hands over packets in batches and loses fewer of a burst of
+    ARP replies. The setting swaps Scapy's global socket classes, so call
+    this once from main() before any scan thread starts.
+    """
+    from scapy.all import conf
+    # Scapy turns this back off (with a warning) if libpcap can't be loaded
+    conf.use_pcap = True
+    return conf.use_pcap
+
+def arp_scan(network, iface, timeout=3):
+    """ARP-scan a subnet and return (ip, mac) pairs in the order they replied
+
+    Instead of srp(), which keeps every request to match answers against,
+    a background sniffer collects ARP replies while all requests go out
+    in a single sendp() call. Where libpcap can compile it, a BPF filter
+    makes the kernel drop everything except ARP replies.
+    """
+    from scapy.all import ARP, AsyncSniffer, sendp
+    from scapy.arch.common import compile_filter
+    from scapy.error import Scapy_Exception
+    
+    try:
+        compile_filter(ARP_REPLY_FILTER)
+        sniff_filter = {'filter': ARP_REPLY_FILTER}
+    except (ImportError, Scapy_Exception):
+        # No libpcap/tcpdump to compile BPF: filter in Python instead
+        sniff_filter = {'lfilter': lambda packet: ARP in packet and packet[ARP].op == 2}
+    targets = [str(host) for host in ipaddress.ip_network(network).hosts()]
+    wanted = set(targets)
+    devices = {}
+    
+    def record(reply):
+        # Keep only (ip, mac) as replies arrive; the packets are not stored
+        if reply[ARP].psrc in wanted:
+            devices.setdefault(reply[ARP].psrc, reply[ARP].hwsrc)
+    
+    started = threading.Event()
+    sniffer = AsyncSniffer(iface=iface, prn=record, store=False,
+                           started_callback=started.set, **sniff_filter)
+    sniffer.start()
+    started.wait(timeout)
+    
+    ether = broadcast_ether()
+    sendp((ether/ARP(pdst=ip) for ip in targets),
+          iface=iface, verbose=0)
+    time.sleep(timeout)
+    sniffer.stop()
+    return list(devices.items())
+
+def arp_scan_all(targets, timeout=3):
+    """ARP-scan several (iface, network) pairs at once and return (ip, mac, iface)
+
+    A scan spends nearly all its time waiting for replies, so each one
+    runs in its own thread and all of them finish in about one timeout.
+    An interface that can't be scanned (down, gone, not Ethernet) is
+    reported and skipped; if every scan fails, the first error is raised.
+    """
+    if not targets:
+        return []
+    
+    def scan_one(target):
+        iface, network = target
+        try:
+            return arp_scan(network, iface, timeout), None
+        except Exception as e:
+            return [], e
+    
+    with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+        results = list(pool.map(scan_one, targets))
+    
+    errors = [error for found, error in results if error is not None]
+    if len(errors) == len(targets):
+        raise errors[0]
+    
+    devices = []
+    for (iface, network), (found, error) in zip(targets, results):
+        if error is not None:
+            print(f"⚠️  Could not scan {network} on {iface}: {error}")
+        devices.extend((ip, mac, iface) for ip, mac in found)
+    return devices
+
+def scan_network_with_arp(info):
     """Perform a network scan using ARP"""
     print_section("ARP Network Scan")
     
-    iface = get_default_interface()
-    
     try:
-        addrs = netifaces.ifaddresses(iface)
-        ip_info = addrs[netifaces.AF_INET][0]
-        ip = ip_info['addr']
-        network = '.'.join(ip.split('.')[:-1]) + '.0/24'
-        
-        print(f"\nScanning network: {network}")
-        print(f"Interface: {iface}")
+        targets = info['targets']
+        for iface, network in targets:
+            print(f"\nScanning network: {network}")
+            print(f"Interface: {iface}")
         print("\nSending ARP requests to all IPs in subnet...")
         print("(This demonstrates ARP's role in network discovery)\n")
         
-        arp = ARP(pdst=network)
-        ether = Ether(dst="ff:ff:ff:ff:ff:ff")
-        packet = ether/arp
-        
-        result = srp(packet, timeout=3, iface=iface, verbose=0)[0]
+        devices = arp_scan_all(targets, timeout=3)
         
-        print(f"{'IP Address':<20} {'MAC Address':<20} {'Response Time'}")
+        print(f"{'IP Address':<20} {'MAC Address':<20} {'Interface':<10} {'Response Time'}")
         print("-" * 60)
         
-        for sent, received in result:
-            print(f"{received.psrc:<20} {received.hwsrc:<20} {'< 3s'}")
+        for ip, mac, iface in devices:
+            print(f"{ip:<20} {mac:<20} {iface:<10} {'< 3s'}")
         
-        print(f"\n✅ Found {len(result)} responding hosts")
+        print(f"\n✅ Found {len(devices)} responding hosts")
         print("\n💡 Each response came from an ARP reply packet")
         print("💡 Only devices in the same broadcast domain respond")
         
@@ -203,15 +346,15 @@ def main():
     
     # Part 5: Send real ARP request (requires sudo)
     try:
-        iface = get_default_interface()
-        addrs = netifaces.ifaddresses(iface)
-        gateway_ip = netifaces.gateways()['default'][netifaces.AF_INET][0]
+        enable_libpcap()
+        info = get_network_info()
+        gateway_ip = info['gateway']
         
         print(f"\nTrying to ARP your default gateway: {gateway_ip}")
-        send_arp_request(gateway_ip)
+        send_arp_request(info, gateway_ip)
         
         # Part 6: Network scan
-        scan_network_with_arp()
+        scan_network_with_arp(info)
         
     except PermissionError:
         print_section("Live ARP Demo")
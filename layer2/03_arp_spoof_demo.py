@@ -18,15 +18,35 @@ Run with: sudo python3 03_arp_spoof_demo.py
 This demo does NOT actually perform the attack - it only shows how it would work.
 """
 
-from scapy.all import ARP, Ether, send, sniff
 import time
 
+# This demo never sends anything, so instead of loading Scapy just to
+# call ARP(...).show(), the packets are printed in the same layout
+ARP_FIELD_TEMPLATE = """###[ ARP ]###
+  hwtype    = Ethernet (10Mb)
+  ptype     = IPv4
+  hwlen     = None
+  plen      = None
+  op        = {op}
+  hwsrc     = {hwsrc}
+  psrc      = {psrc}
+  hwdst     = {hwdst}
+  pdst      = {pdst}
+"""
+
+ARP_OPS = {1: 'who-has', 2: 'is-at'}
+
 def print_section(title):
     """Pretty print section headers"""
     print(f"\n{'='*60}")
     print(f"  {title}")
     print('='*60)
 
+def format_arp(op, hwsrc, psrc, hwdst="00:00:00:00:00:00", pdst="0.0.0.0"):
+    """Format an ARP packet's fields the way Scapy's show() prints them"""
+    return ARP_FIELD_TEMPLATE.format(op=ARP_OPS[op], hwsrc=hwsrc, psrc=psrc,
+                                     hwdst=hwdst, pdst=pdst)
+
 def explain_arp_vulnerability():
     """Explain the ARP security issue"""
     print_section("Why ARP is Vulnerable")
@@ -60,16 +80,17 @@ def show_normal_arp_flow():
     print()
     
     print("Step 1: Host sends ARP request")
-    arp_req = ARP(op=1, pdst="192.168.1.1", psrc="192.168.1.10")
-    print(arp_req.show(dump=True))
+    print(format_arp(op=1,
+                     hwsrc="aa:bb:cc:dd:ee:10",  # Host's MAC
+                     psrc="192.168.1.10",
+                     pdst="192.168.1.1"))
     
     print("\nStep 2: Gateway sends legitimate ARP reply")
-    arp_reply = ARP(op=2, 
-                    hwsrc="aa:bb:cc:dd:ee:01",  # Gateway's real MAC
-                    psrc="192.168.1.1",
-                    hwdst="aa:bb:cc:dd:ee:10",  # Host's MAC
-                    pdst="192.168.1.10")
-    print(arp_reply.show(dump=True))
+    print(format_arp(op=2,
+                     hwsrc="aa:bb:cc:dd:ee:01",  # Gateway's real MAC
+                     psrc="192.168.1.1",
+                     hwdst="aa:bb:cc:dd:ee:10",  # Host's MAC
+                     pdst="192.168.1.10"))
     
     print("\n✅ Host now knows: 192.168.1.1 → aa:bb:cc:dd:ee:01")
 
@@ -85,13 +106,11 @@ def show_arp_spoof_attack():
     print()
     
     print("Attacker sends FAKE ARP reply to Victim:")
-    fake_arp = ARP(op=2,  # ARP reply
-                   hwsrc="11:22:33:44:55:99",  # Attacker's MAC (lying!)
-                   psrc="192.168.1.1",          # Claiming to be gateway
-                   hwdst="aa:bb:cc:dd:ee:10",  # Victim's MAC
-                   pdst="192.168.1.10")         # Victim's IP
-    
-    print(fake_arp.show(dump=True))
+    print(format_arp(op=2,  # ARP reply
+                     hwsrc="11:22:33:44:55:99",  # Attacker's MAC (lying!)
+                     psrc="192.168.1.1",          # Claiming to be gateway
+                     hwdst="aa:bb:cc:dd:ee:10",  # Victim's MAC
+                     pdst="192.168.1.10"))        # Victim's IP
     
     print("\n❌ Victim now INCORRECTLY believes:")
     print("   192.168.1.1 (Gateway) → 11:22:33:44:55:99 (Attacker's MAC!)")
@@ -165,17 +184,15 @@ def build_safe_demo_packets():
     print_section("Packet Construction (Not Sent)")
     
     print("\nExample 1: Legitimate ARP reply")
-    legit = ARP(op=2, hwsrc="aa:bb:cc:dd:ee:01", psrc="192.168.1.1")
-    print(legit.show(dump=True))
+    print(format_arp(op=2, hwsrc="aa:bb:cc:dd:ee:01", psrc="192.168.1.1"))
     
     print("\nExample 2: Gratuitous ARP (can be legitimate)")
-    grat = ARP(op=2, psrc="192.168.1.10", pdst="192.168.1.10")
-    print(grat.show(dump=True))
+    print(format_arp(op=2, hwsrc="aa:bb:cc:dd:ee:10", psrc="192.168.1.10",
+                     pdst="192.168.1.10"))
     
     print("\nExample 3: Spoofed packet structure (DEMO ONLY)")
-    spoofed = ARP(op=2, hwsrc="11:22:33:44:55:99", psrc="192.168.1.1", 
-                  pdst="192.168.1.10")
-    print(spoofed.show(dump=True))
+    print(format_arp(op=2, hwsrc="11:22:33:44:55:99", psrc="192.168.1.1",
+                     pdst="192.168.1.10"))
     
     print("\n⚠️  These packets are NOT being sent!")
     print("This is purely educational to understand the structure.")
@@ -17,15 +17,55 @@ EXPERIMENT IDEAS:
 3. Create packets with different flags
 """
 
-from scapy.all import IP, ICMP, Raw, fragment, send, sr1
+# Scapy takes a while to load, so it is imported inside the functions
+# that build packets; the explanations print without waiting for it.
+import functools
 import struct
 
+# IP protocol numbers shown by demonstrate_protocols()
+PROTO_NAMES = {
+    1: "ICMP",
+    6: "TCP",
+    17: "UDP",
+    41: "IPv6 encapsulation",
+    50: "ESP (IPsec)",
+}
+
+# RFC 791 IPv4 header layout, printed by explain_ip_basics()
+IP_HEADER_DIAGRAM = """\
+ 0                   1                   2                   3
+ 0 1 2 3 4 5 6 7 8 9 0 1 2 3 4 5 6 7 8 9 0 1 2 3 4 5 6 7 8 9 0 1
++-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+|Version|  IHL  |Type of Service|          Total Length         |
++-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+|         Identification        |Flags|      Fragment Offset    |
++-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+|  Time to Live |    Protocol   |         Header Checksum       |
++-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+|                       Source Address                          |
++-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+|                    Destination Address                        |
++-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+"""
+
+# Name of every value of the 3-bit IP flags field: reserved (4), DF (2), MF (1)
+IP_FLAG_NAMES = tuple(
+    "+".join(name for bit, name in ((4, "reserved"), (2, "DF"), (1, "MF")) if value & bit) or "none"
+    for value in range(8)
+)
+
 def print_section(title):
     """Pretty print section headers"""
     print(f"\n{'='*60}")
     print(f"  {title}")
     print('='*60)
 
+@functools.lru_cache(maxsize=16)
+def ip_summary(dst, ttl=64, tos=0):
+    """One-line summary of an IP packet (cached, the demos reuse a few values)"""
+    from scapy.all import IP
+    return IP(dst=dst, ttl=ttl, tos=tos).summary()
+
 def explain_ip_basics():
     """Explain IP fundamentals"""
     print_section("IP (Internet Protocol) Basics")
@@ -36,24 +76,12 @@ IP provides:
 ✓ Best-effort delivery: No guarantees (unlike TCP)
 
 IPv4 Packet Header: 20 bytes minimum (without options)
-
- 0                   1                   2                   3
- 0 1 2 3 4 5 6 7 8 9 0 1 2 3 4 5 6 7 8 9 0 1 2 3 4 5 6 7 8 9 0 1
-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
-|Version|  IHL  |Type of Service|          Total Length         |
-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
-|         Identification        |Flags|      Fragment Offset    |
-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
-|  Time to Live |    Protocol   |         Header Checksum       |
-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
-|                       Source Address                          |
-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
-|                    Destination Address                        |
-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
-    """)
+""")
+    print(IP_HEADER_DIAGRAM)
 
 def create_basic_ip_packet():
     """Create and display a basic IP packet"""
+    from scapy.all import IP
     print_section("Creating a Basic IP Packet")
     
     # Create IP packet
@@ -63,20 +91,22 @@ def create_basic_ip_packet():
     print(packet.show(dump=True))
     
     print("\n\nField-by-Field Breakdown:")
-    print(f"Version: {packet.version} (4 = IPv4, 6 = IPv6)")
-    print(f"IHL (Header Length): {packet.ihl} (in 32-bit words, {packet.ihl * 4} bytes)")
-    print(f"TOS (Type of Service): {packet.tos:#04x}")
-    print(f"Total Length: {packet.len} bytes")
-    print(f"Identification: {packet.id} (for fragment reassembly)")
-    print(f"Flags: {packet.flags}")
-    print(f"  - DF (Don't Fragment): {bool(packet.flags & 2)}")
-    print(f"  - MF (More Fragments): {bool(packet.flags & 1)}")
-    print(f"Fragment Offset: {packet.frag}")
-    print(f"TTL (Time To Live): {packet.ttl} hops")
-    print(f"Protocol: {packet.proto} (1=ICMP, 6=TCP, 17=UDP)")
-    print(f"Checksum: {packet.chksum:#06x}")
-    print(f"Source IP: {packet.src}")
-    print(f"Destination IP: {packet.dst}")
+    print("\n".join([
+        f"Version: {packet.version} (4 = IPv4, 6 = IPv6)",
+        f"IHL (Header Length): {packet.ihl} (in 32-bit words, {packet.ihl * 4} bytes)",
+        f"TOS (Type of Service): {packet.tos:#04x}",
+        f"Total Length: {packet.len} bytes",
+        f"Identification: {packet.id} (for fragment reassembly)",
+        f"Flags: {int(packet.flags)} ({IP_FLAG_NAMES[int(packet.flags)]})",
+        f"  - DF (Don't Fragment): {bool(packet.flags & 2)}",
+        f"  - MF (More Fragments): {bool(packet.flags & 1)}",
+        f"Fragment Offset: {packet.frag}",
+        f"TTL (Time To Live): {packet.ttl} hops",
+        f"Protocol: {packet.proto} (1=ICMP, 6=TCP, 17=UDP)",
+        f"Checksum: {packet.chksum:#06x}",
+        f"Source IP: {packet.src}",
+        f"Destination IP: {packet.dst}",
+    ]))
     
     return packet
 
@@ -97,9 +127,8 @@ Common TTL values:
     """)
     
     print("\nPackets with different TTLs:")
-    for ttl in [1, 10, 64, 255]:
-        packet = IP(dst="8.8.8.8", ttl=ttl)
-        print(f"\nTTL={ttl:3d}: {packet.summary()}")
+    print("\n".join(f"\nTTL={ttl:3d}: {ip_summary('8.8.8.8', ttl=ttl)}"
+                    for ttl in [1, 10, 64, 255]))
     
     print("\n💡 Traceroute uses TTL to discover route!")
     print("   Sends packets with TTL=1, 2, 3... to find each hop")
@@ -128,12 +157,12 @@ Common DSCP values:
     ]
     
     for tos, desc in configs:
-        packet = IP(dst="8.8.8.8", tos=tos)
         print(f"\nTOS={tos:#04x} ({desc}):")
-        print(f"  {packet.summary()}")
+        print(f"  {ip_summary('8.8.8.8', tos=tos)}")
 
 def demonstrate_fragmentation():
     """Show IP fragmentation"""
+    from scapy.all import ICMP, IP, Raw
     print_section("IP Fragmentation")
     
     print("""
@@ -150,19 +179,30 @@ Flags:
     
     # Create a large packet
     large_packet = IP(dst="8.8.8.8")/ICMP()/Raw(b"X"*2000)
-    print(f"\nOriginal packet size: {len(large_packet)} bytes")
+    raw = bytes(large_packet)
+    print(f"\nOriginal packet size: {len(raw)} bytes")
     print(f"Payload size: 2000 bytes")
     
-    # Fragment it
-    fragments = fragment(large_packet, fragsize=500)
+    # Fragment it by slicing the bytes after the IP header, the same way
+    # Scapy's fragment(large_packet, fragsize=500) does, but without
+    # building a packet object for every piece
+    header_len = (raw[0] & 0x0F) * 4
+    payload = raw[header_len:]
+    fragsize = 500
+    step = fragsize - fragsize % 8  # offsets count 8-byte blocks
+    # Every piece but the last holds `step` bytes; the last up to fragsize
+    count = (len(payload) - fragsize + step - 1) // step + 1
     
-    print(f"\nFragmented into {len(fragments)} pieces:")
-    for i, frag in enumerate(fragments):
+    print(f"\nFragmented into {count} pieces:")
+    for i in range(count):
+        start = i * step
+        end = start + step if i < count - 1 else start + fragsize
+        piece = payload[start:end]
         print(f"\nFragment {i+1}:")
-        print(f"  ID: {frag[IP].id}")
-        print(f"  MF flag: {bool(frag[IP].flags & 1)}")
-        print(f"  Fragment offset: {frag[IP].frag}")
-        print(f"  Size: {len(frag)} bytes")
+        print(f"  ID: {large_packet[IP].id}")
+        print(f"  MF flag: {i < count - 1}")
+        print(f"  Fragment offset: {start // 8}")
+        print(f"  Size: {header_len + len(piece)} bytes")
 
 def demonstrate_protocols():
     """Show different protocol numbers"""
@@ -172,18 +212,9 @@ def demonstrate_protocols():
 Protocol field identifies the next-layer protocol:
     """)
     
-    protocols = [
-        (IP(dst="8.8.8.8")/ICMP(), "ICMP (1)"),
-        (IP(dst="8.8.8.8", proto=6), "TCP (6)"),
-        (IP(dst="8.8.8.8", proto=17), "UDP (17)"),
-        (IP(dst="8.8.8.8", proto=41), "IPv6 encapsulation (41)"),
-        (IP(dst="8.8.8.8", proto=50), "ESP (IPsec, 50)"),
-    ]
-    
-    for packet, desc in protocols:
-        print(f"\n{desc}:")
-        print(f"  Protocol number: {packet[IP].proto}")
-        print(f"  Summary: {packet.summary()}")
+    for number, name in PROTO_NAMES.items():
+        print(f"\n{name} ({number}):")
+        print(f"  Protocol number: {number}")
 
 def compare_ipv4_ipv6():
     """Compare IPv4 and IPv6"""
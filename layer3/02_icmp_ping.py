@@ -17,20 +17,40 @@ EXPERIMENT IDEAS:
 3. Change TTL to test reachability
 """
 
-from scapy.all import IP, ICMP, sr1, send
+from scapy.all import IP, ICMP, AsyncSniffer, Scapy_Exception, conf, resolve_iface, sr1, send
+from scapy.arch.common import compile_filter
+import functools
+import os
+import socket
+import struct
+import sys
+import threading
 import time
 import statistics
 
+# ICMP type 0 (echo reply), as a BPF filter the kernel can apply
+ECHO_REPLY_FILTER = "icmp[icmptype] = icmp-echoreply"
+
+# What test_different_ttls() reports for each ICMP reply type
+TTL_RESULTS = {
+    0: "✅ Success! Reply from {src} ({rtt:.2f} ms)",
+    11: "⏱️  Time Exceeded from {src} (hop {ttl})",
+}
+
+# Filler for ping payloads; slice it to the size wanted
+PAYLOAD = b"X" * 65535
+
 def print_section(title):
     """Pretty print section headers"""
     print(f"\n{'='*60}")
     print(f"  {title}")
     print('='*60)
 
-def explain_icmp():
-    """Explain ICMP protocol"""
-    print_section("ICMP (Internet Control Message Protocol)")
-    print("""
+def section_text(title, body):
+    """print_section(title) followed by print(body), as one string"""
+    return f"\n{'='*60}\n  {title}\n{'='*60}\n{body}\n"
+
+ICMP_EXPLANATION = section_text("ICMP (Internet Control Message Protocol)", """
 ICMP is used for:
 ✓ Network diagnostics (ping, traceroute)
 ✓ Error reporting (destination unreachable, time exceeded)
@@ -53,6 +73,28 @@ ICMP Echo structure:
 - Data: Optional payload
     """)
 
+def explain_icmp():
+    """Explain ICMP protocol"""
+    sys.stdout.write(ICMP_EXPLANATION)
+
+def icmp_checksum(data):
+    """16-bit one's complement checksum of data (RFC 1071)
+
+    All 16-bit words are unpacked in one struct call and summed, then
+    the carries are folded back into the low 16 bits.
+    """
+    if len(data) % 2:
+        data += b"\0"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    while total >> 16:
+        total = (total & 0xFFFF) + (total >> 16)
+    return ~total & 0xFFFF
+
+def build_echo_request(ident, seq, payload=b""):
+    """ICMP echo request as raw bytes, built with struct instead of Scapy"""
+    checksum = icmp_checksum(struct.pack("!BBHHH", 8, 0, 0, ident, seq) + payload)
+    return struct.pack("!BBHHH", 8, 0, checksum, ident, seq) + payload
+
 def create_icmp_packet():
     """Create and display ICMP packet"""
     print_section("Creating ICMP Echo Request")
@@ -68,74 +110,134 @@ def create_icmp_packet():
     print("\n\nICMP Header Fields:")
     print(f"Type: {icmp.type} (8 = Echo Request)")
     print(f"Code: {icmp.code} (0 = No code)")
-    print(f"Checksum: {icmp.chksum} (calculated automatically)")
+    raw_icmp = build_echo_request(icmp.id, icmp.seq, bytes(packet[ICMP].payload))
+    print(f"Checksum: {struct.unpack('!H', raw_icmp[2:4])[0]:#06x} (one's complement sum of the ICMP message)")
     print(f"Identifier: {icmp.id} (matches request to reply)")
     print(f"Sequence: {icmp.seq} (counts ping attempts)")
     print(f"Payload: {packet[ICMP].load if hasattr(packet[ICMP], 'load') else 'None'}")
     
     return packet
 
+@functools.lru_cache(maxsize=32)
+def echo_template(dst):
+    """IP header for echo requests to dst, built once"""
+    return IP(dst=dst, proto="icmp")
+
+def echo_request(dst, size=0, ttl=64, ident=0, seq=0):
+    """Copy the cached IP header and add this request's ICMP message
+
+    The ICMP bytes, checksum included, come from build_echo_request(),
+    so Scapy only dissects them and never computes the checksum itself.
+    """
+    packet = echo_template(dst).copy()
+    packet.ttl = ttl
+    return packet/ICMP(build_echo_request(ident, seq, PAYLOAD[:size]))
+
 def send_single_ping(destination, timeout=2, ttl=64):
     """Send a single ping and get response"""
     print(f"\nPinging {destination}...")
     
     # Create packet
-    packet = IP(dst=destination, ttl=ttl)/ICMP()
+    packet = echo_request(destination, ttl=ttl)
     
     # Record time and send
-    start_time = time.time()
+    start_ns = time.perf_counter_ns()
     reply = sr1(packet, timeout=timeout, verbose=0)
-    rtt = (time.time() - start_time) * 1000  # Convert to ms
+    rtt = (time.perf_counter_ns() - start_ns) / 1e6  # Convert to ms
     
     if reply:
+        icmp = reply[ICMP]
         print(f"✅ Reply from {reply.src}")
         print(f"   TTL: {reply.ttl}")
         print(f"   Time: {rtt:.2f} ms")
-        print(f"   ICMP Type: {reply[ICMP].type} (0 = Echo Reply)")
-        print(f"   Sequence: {reply[ICMP].seq}")
+        print(f"   ICMP Type: {icmp.type} (0 = Echo Reply)")
+        print(f"   Sequence: {icmp.seq}")
         return rtt
     else:
         print(f"❌ No reply (timeout after {timeout}s)")
         return None
 
-def ping_host(destination, count=4, interval=1, size=56):
-    """Implement a full ping utility"""
+def ping_host(destination, count=4, interval=1, size=56, timeout=2):
+    """Implement a full ping utility
+
+    sr1() per request would open a new socket each time and wait for each
+    reply before the next request. Instead, one background sniffer
+    collects the replies while the requests go out every interval on a
+    single raw socket. Replies are matched to requests by ICMP id and seq.
+    """
     print_section(f"PING {destination}")
     
     print(f"Sending {count} ICMP echo requests with {size} bytes of data\n")
     
-    sent = 0
-    received = 0
-    rtts = []
+    dst_ip = socket.gethostbyname(destination)
+    ident = os.getpid() & 0xFFFF
+    packets = [echo_request(dst_ip, size, ident=ident, seq=i) for i in range(count)]
+    sent_at = {}
+    rtts = {}
+    all_replied = threading.Event()
+    
+    def is_our_reply(packet):
+        # Runs for every packet sniffed, so look the ICMP layer up once
+        icmp = packet.getlayer(ICMP)
+        return icmp is not None and icmp.type == 0 and icmp.id == ident
+    
+    def on_reply(reply):
+        received_ns = time.perf_counter_ns()
+        seq = reply[ICMP].seq
+        if seq not in sent_at or seq in rtts:
+            return
+        rtts[seq] = (received_ns - sent_at[seq]) / 1e6
+        print(f"{len(packets[seq])} bytes from {reply[IP].src}: icmp_seq={seq} ttl={reply.ttl} time={rtts[seq]:.2f} ms")
+        if len(rtts) == count:
+            all_replied.set()
+    
+    try:
+        compile_filter(ECHO_REPLY_FILTER)
+        sniff_filter = {'filter': ECHO_REPLY_FILTER}
+    except (ImportError, Scapy_Exception):
+        # No libpcap/tcpdump to compile BPF: the lfilter below does it all
+        sniff_filter = {}
+    
+    # Send and sniff on the interface the route to the destination uses
+    iface = resolve_iface(conf.route.route(dst_ip)[0] or conf.iface)
+    started = threading.Event()
+    sniffer = AsyncSniffer(
+        iface=iface, prn=on_reply, store=False, started_callback=started.set,
+        lfilter=is_our_reply,
+        **sniff_filter)
+    sniffer.start()
+    started.wait(timeout)
+    
+    sock = iface.l3socket(False)(iface=iface)
+    try:
+        for i, packet in enumerate(packets):
+            sent_at[i] = time.perf_counter_ns()
+            sock.send(packet)
+            
+            # Wait before next ping (except for last one)
+            if i < count - 1:
+                time.sleep(interval)
+        all_replied.wait(timeout)
+    finally:
+        sock.close()
+        sniffer.stop()
     
     for i in range(count):
-        # Create packet with sequence number
-        packet = IP(dst=destination)/ICMP(seq=i)/("X" * size)
-        
-        # Send and time
-        start_time = time.time()
-        reply = sr1(packet, timeout=2, verbose=0)
-        rtt = (time.time() - start_time) * 1000
-        
-        sent += 1
-        
-        if reply:
-            received += 1
-            rtts.append(rtt)
-            print(f"{len(packet)} bytes from {reply.src}: icmp_seq={i} ttl={reply.ttl} time={rtt:.2f} ms")
-        else:
+        if i not in rtts:
             print(f"Request timeout for icmp_seq {i}")
-        
-        # Wait before next ping (except for last one)
-        if i < count - 1:
-            time.sleep(interval)
     
     # Statistics
+    sent = count
+    received = len(rtts)
     print(f"\n--- {destination} ping statistics ---")
     print(f"{sent} packets transmitted, {received} received, {(sent-received)/sent*100:.1f}% packet loss")
     
     if rtts:
-        print(f"rtt min/avg/max/stddev = {min(rtts):.2f}/{statistics.mean(rtts):.2f}/{max(rtts):.2f}/{statistics.stdev(rtts) if len(rtts) > 1 else 0:.2f} ms")
+        rtts = list(rtts.values())
+        # Compute the mean once; stdev() would otherwise compute it again
+        avg = statistics.fmean(rtts)
+        stddev = statistics.stdev(rtts, avg) if len(rtts) > 1 else 0
+        print(f"rtt min/avg/max/stddev = {min(rtts):.2f}/{avg:.2f}/{max(rtts):.2f}/{stddev:.2f} ms")
 
 def demonstrate_icmp_types():
     """Show different ICMP message types"""
@@ -163,20 +265,17 @@ def test_different_ttls(destination):
     print("(Lower TTL values may cause 'Time Exceeded' errors)\n")
     
     for ttl in [1, 5, 10, 64]:
-        packet = IP(dst=destination, ttl=ttl)/ICMP()
-        start_time = time.time()
+        packet = echo_request(destination, ttl=ttl)
+        start_ns = time.perf_counter_ns()
         reply = sr1(packet, timeout=2, verbose=0)
-        rtt = (time.time() - start_time) * 1000
+        rtt = (time.perf_counter_ns() - start_ns) / 1e6
         
         if reply:
-            if reply.haslayer(ICMP):
-                icmp_type = reply[ICMP].type
-                if icmp_type == 0:
-                    print(f"TTL {ttl:3d}: ✅ Success! Reply from {reply.src} ({rtt:.2f} ms)")
-                elif icmp_type == 11:
-                    print(f"TTL {ttl:3d}: ⏱️  Time Exceeded from {reply.src} (hop {ttl})")
-                else:
-                    print(f"TTL {ttl:3d}: ⚠️  ICMP Type {icmp_type} from {reply.src}")
+            icmp = reply.getlayer(ICMP)
+            if icmp is not None:
+                result = TTL_RESULTS.get(icmp.type, "⚠️  ICMP Type {icmp_type} from {src}")
+                print(f"TTL {ttl:3d}: " + result.format(
+                    src=reply.src, rtt=rtt, ttl=ttl, icmp_type=icmp.type))
         else:
             print(f"TTL {ttl:3d}: ❌ No reply")
 
@@ -190,7 +289,7 @@ def analyze_ping_sizes(destination):
     sizes = [0, 56, 500, 1472, 2000]
     
     for size in sizes:
-        packet = IP(dst=destination)/ICMP()/"X" * size
+        packet = echo_request(destination, size)
         total_size = len(packet)
         
         reply = sr1(packet, timeout=2, verbose=0)
@@ -17,8 +17,13 @@ EXPERIMENT IDEAS:
 3. Use different protocols (ICMP, UDP, TCP)
 """
 
-from scapy.all import IP, ICMP, UDP, sr1
+from scapy.all import IP, ICMP, UDP, sr, sr1
+import functools
+import socket
 import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 def print_section(title):
     """Pretty print section headers"""
@@ -26,10 +31,31 @@ def print_section(title):
     print(f"  {title}")
     print('='*60)
 
-def explain_traceroute():
-    """Explain how traceroute works"""
-    print_section("How Traceroute Works")
-    print("""
+# How traceroute() reads an ICMP reply to a probe, by protocol and ICMP
+# type: (note to print, destination reached?)
+HOP_REPLIES = {
+    "icmp": {
+        11: ("intermediate hop", False),     # Time Exceeded (TTL=0 at this hop)
+        0: ("destination reached", True),    # Echo Reply
+    },
+    "udp": {
+        11: ("intermediate hop", False),     # Time Exceeded (TTL=0 at this hop)
+        3: ("destination reached", True),    # Port Unreachable: UDP hit a closed port
+        0: ("destination reached", True),    # Echo Reply
+    },
+}
+
+# What demonstrate_ttl_behavior() reports for each ICMP reply type
+TTL_RESULTS = {
+    11: "Time Exceeded (TTL expired at hop {ttl})",
+    0: "Echo Reply (reached destination)",
+}
+
+def section_text(title, body):
+    """print_section(title) followed by print(body), as one string"""
+    return f"\n{'='*60}\n  {title}\n{'='*60}\n{body}\n"
+
+TRACEROUTE_EXPLANATION = section_text("How Traceroute Works", """
 Traceroute discovers the path packets take to a destination.
 
 Principle:
@@ -54,92 +80,130 @@ When destination reached:
 Result: We've mapped the entire path!
     """)
 
+def explain_traceroute():
+    """Explain how traceroute works"""
+    sys.stdout.write(TRACEROUTE_EXPLANATION)
+
+@functools.lru_cache(maxsize=32)
+def probe_template(destination, protocol="icmp"):
+    """IP/ICMP or IP/UDP probe to destination, built once and copied per TTL"""
+    if protocol == "udp":
+        return IP(dst=destination)/UDP()
+    return IP(dst=destination)/ICMP()
+
+def ttl_probe(destination, ttl, protocol="icmp"):
+    """Copy the cached probe and set its TTL
+
+    The ICMP seq (or UDP port) also depends on the TTL, so each reply
+    can be told apart.
+    """
+    packet = probe_template(destination, protocol).copy()
+    packet.ttl = ttl
+    if protocol == "udp":
+        packet[UDP].dport = 33434 + ttl
+    else:
+        packet[ICMP].seq = ttl
+    return packet
+
 def traceroute(destination, max_hops=30, timeout=2, protocol="icmp"):
     """Perform traceroute to destination"""
     print_section(f"Tracerouting to {destination}")
     print(f"Using {protocol.upper()} packets, max {max_hops} hops\n")
     
-    for ttl in range(1, max_hops + 1):
-        # Create packet based on protocol
-        if protocol.lower() == "icmp":
-            packet = IP(dst=destination, ttl=ttl)/ICMP()
-        elif protocol.lower() == "udp":
-            packet = IP(dst=destination, ttl=ttl)/UDP(dport=33434+ttl)
-        else:
-            print(f"Unknown protocol: {protocol}")
-            return
-        
-        # Send packet and wait for reply
-        reply = sr1(packet, verbose=0, timeout=timeout)
+    # Create one packet per TTL based on protocol
+    if protocol.lower() not in ("icmp", "udp"):
+        print(f"Unknown protocol: {protocol}")
+        return
+    ttls = range(1, max_hops + 1)
+    packets = [ttl_probe(destination, ttl, protocol.lower()) for ttl in ttls]
+    
+    # Send every TTL at once and let sr() match each reply to its probe
+    # (Time Exceeded quotes the probe's header), instead of waiting up
+    # to timeout for each hop in turn. A short gap between probes keeps
+    # routers that rate-limit ICMP errors from dropping too many replies.
+    answered, _ = sr(packets, verbose=0, timeout=timeout, inter=0.05)
+    replies = {sent.ttl: reply for sent, reply in answered}
+    
+    for ttl in ttls:
+        reply = replies.get(ttl)
         
         if reply is None:
             print(f"{ttl:2d}  *  *  * (timeout)")
-        elif reply.haslayer(ICMP):
-            icmp_type = reply[ICMP].type
-            icmp_code = reply[ICMP].code
-            
-            # Time Exceeded (TTL=0 at this hop)
-            if icmp_type == 11:
-                print(f"{ttl:2d}  {reply.src:15s}  (intermediate hop)")
-            
-            # Destination Unreachable (UDP hit closed port = we're there!)
-            elif icmp_type == 3 and protocol.lower() == "udp":
-                print(f"{ttl:2d}  {reply.src:15s}  (destination reached)")
-                break
-            
-            # Echo Reply (ICMP reached destination)
-            elif icmp_type == 0:
-                print(f"{ttl:2d}  {reply.src:15s}  (destination reached)")
+            continue
+        
+        icmp = reply.getlayer(ICMP)
+        if icmp is not None:
+            note, reached = HOP_REPLIES[protocol.lower()].get(
+                icmp.type, (f"ICMP type={icmp.type} code={icmp.code}", False))
+            print(f"{ttl:2d}  {reply.src:15s}  ({note})")
+            if reached:
                 break
-            
-            # Other ICMP message
-            else:
-                print(f"{ttl:2d}  {reply.src:15s}  (ICMP type={icmp_type} code={icmp_code})")
         else:
             print(f"{ttl:2d}  {reply.src:15s}  (unexpected response)")
         
         # Check if we reached destination
-        if reply and reply.src == destination:
+        if reply.src == destination:
             break
     else:
         print(f"\nMax hops ({max_hops}) reached without reaching destination")
 
+@functools.lru_cache(maxsize=1024)
+def reverse_dns(ip):
+    """Hostname for ip, or "-" if it has none (cached, lookups can be slow)"""
+    try:
+        return socket.gethostbyaddr(ip)[0][:30]
+    except OSError:
+        return "-"
+
 def traceroute_with_timing(destination, max_hops=30):
-    """Traceroute with RTT timing"""
+    """Traceroute with RTT timing
+
+    Hostnames are looked up in a thread pool while the next hops are
+    probed, so a slow reverse DNS lookup never delays a probe. Each row
+    is printed, in hop order, as soon as its hostname is known.
+    """
     print_section(f"Traceroute with Timing: {destination}")
     
-    import time
-    
     print(f"{'Hop':<4} {'IP Address':<20} {'RTT (ms)':<12} {'Hostname'}")
     print("-" * 60)
     
-    for ttl in range(1, max_hops + 1):
-        packet = IP(dst=destination, ttl=ttl)/ICMP()
-        
-        # Measure RTT
-        start = time.time()
-        reply = sr1(packet, verbose=0, timeout=2)
-        rtt = (time.time() - start) * 1000
-        
-        if reply is None:
+    def print_hop(ttl, ip, rtt, hostname):
+        if ip is None:
             print(f"{ttl:<4} {'*':<20} {'timeout':<12}")
         else:
-            ip = reply.src
+            print(f"{ttl:<4} {ip:<20} {rtt:>8.2f} ms  {hostname.result()}")
+    
+    pending = deque()
+    reached = False
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        for ttl in range(1, max_hops + 1):
+            packet = ttl_probe(destination, ttl)
             
-            # Try to get hostname (may be slow)
-            try:
-                import socket
-                hostname = socket.gethostbyaddr(ip)[0][:30]
-            except:
-                hostname = "-"
+            # Measure RTT
+            start_ns = time.perf_counter_ns()
+            reply = sr1(packet, verbose=0, timeout=2)
+            rtt = (time.perf_counter_ns() - start_ns) / 1e6
             
-            print(f"{ttl:<4} {ip:<20} {rtt:>8.2f} ms  {hostname}")
+            if reply is None:
+                pending.append((ttl, None, rtt, None))
+            else:
+                pending.append((ttl, reply.src, rtt, pool.submit(reverse_dns, reply.src)))
+            
+            # Print every leading row whose lookup has finished
+            while pending and (pending[0][3] is None or pending[0][3].done()):
+                print_hop(*pending.popleft())
             
             # Check if reached destination
-            if reply.haslayer(ICMP):
-                if reply[ICMP].type == 0 or reply.src == destination:
-                    print(f"\n✅ Reached {destination} in {ttl} hops")
-                    break
+            icmp = reply.getlayer(ICMP) if reply is not None else None
+            if icmp is not None and (icmp.type == 0 or reply.src == destination):
+                reached = True
+                break
+        
+        while pending:
+            print_hop(*pending.popleft())
+    
+    if reached:
+        print(f"\n✅ Reached {destination} in {ttl} hops")
 
 def demonstrate_ttl_behavior():
     """Show TTL behavior in detail"""
@@ -152,29 +216,20 @@ def demonstrate_ttl_behavior():
     print("-" * 70)
     
     for ttl in [1, 2, 3, 64]:
-        packet = IP(dst=destination, ttl=ttl)/ICMP()
+        packet = ttl_probe(destination, ttl)
         reply = sr1(packet, verbose=0, timeout=2)
         
         if reply is None:
             print(f"{ttl:<5} {'Timeout - no response':<50}")
-        elif reply.haslayer(ICMP):
-            icmp_type = reply[ICMP].type
-            
-            if icmp_type == 11:
-                result = f"Time Exceeded (TTL expired at hop {ttl})"
-                print(f"{ttl:<5} {result:<50} {reply.src}")
-            elif icmp_type == 0:
-                result = "Echo Reply (reached destination)"
-                print(f"{ttl:<5} {result:<50} {reply.src}")
-            else:
-                result = f"ICMP Type {icmp_type}"
-                print(f"{ttl:<5} {result:<50} {reply.src}")
+            continue
+        
+        icmp = reply.getlayer(ICMP)
+        if icmp is not None:
+            result = TTL_RESULTS.get(icmp.type, "ICMP Type {icmp_type}").format(
+                ttl=ttl, icmp_type=icmp.type)
+            print(f"{ttl:<5} {result:<50} {reply.src}")
 
-def compare_protocols():
-    """Compare different traceroute protocols"""
-    print_section("Comparing Traceroute Protocols")
-    
-    print("""
+PROTOCOL_COMPARISON = section_text("Comparing Traceroute Protocols", """
 Different traceroute implementations use different protocols:
 
 1. ICMP (Type 8 - Echo Request):
@@ -198,6 +253,10 @@ Different traceroute implementations use different protocols:
 Each has advantages depending on network filtering!
     """)
 
+def compare_protocols():
+    """Compare different traceroute protocols"""
+    sys.stdout.write(PROTOCOL_COMPARISON)
+
 def main():
     """Main demonstration function"""
     print("\n" + "="*60)
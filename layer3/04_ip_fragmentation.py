@@ -20,16 +20,20 @@ EXPERIMENT IDEAS:
 from scapy.all import IP, ICMP, Raw, fragment, send, sr1
 import sys
 
+# Filler for oversized payloads; slice it to the size wanted
+PAYLOAD = b"X" * 65535
+
 def print_section(title):
     """Pretty print section headers"""
     print(f"\n{'='*60}")
     print(f"  {title}")
     print('='*60)
 
-def explain_fragmentation():
-    """Explain IP fragmentation"""
-    print_section("IP Fragmentation")
-    print("""
+def section_text(title, body):
+    """print_section(title) followed by print(body), as one string"""
+    return f"\n{'='*60}\n  {title}\n{'='*60}\n{body}\n"
+
+FRAGMENTATION_EXPLANATION = section_text("IP Fragmentation", """
 Why Fragmentation?
 - Each network has a Maximum Transmission Unit (MTU)
 - Ethernet MTU: 1500 bytes
@@ -61,12 +65,16 @@ Problems with Fragmentation:
 - Better to avoid via Path MTU Discovery
     """)
 
+def explain_fragmentation():
+    """Explain IP fragmentation"""
+    sys.stdout.write(FRAGMENTATION_EXPLANATION)
+
 def demonstrate_fragmentation():
     """Show fragmentation in action"""
     print_section("Creating and Fragmenting a Packet")
     
     # Create a large packet
-    large_data = "X" * 2000
+    large_data = PAYLOAD[:2000]
     packet = IP(dst="8.8.8.8")/ICMP()/Raw(load=large_data)
     
     print(f"\nOriginal Packet:")
@@ -91,10 +99,7 @@ def demonstrate_fragmentation():
         print(f"  Fragment Offset: {ip.frag} (byte position: {ip.frag * 8})")
         print(f"  More Fragments: {'Yes' if ip.flags & 1 else 'No (Last)'}")
 
-def test_mtu_discovery():
-    """Demonstrate Path MTU Discovery"""
-    print_section("Path MTU Discovery")
-    print("""
+PMTUD_EXPLANATION = section_text("Path MTU Discovery", """
 Modern systems use Path MTU Discovery (PMTUD):
 
 1. Sender sets DF (Don't Fragment) flag
@@ -117,6 +122,22 @@ IPv6:
 - Minimum MTU: 1280 bytes
     """)
 
+def test_mtu_discovery():
+    """Demonstrate Path MTU Discovery"""
+    sys.stdout.write(PMTUD_EXPLANATION)
+
+def fragment_count(ip_payload, mtu, ip_header=20):
+    """Number of IP fragments needed to carry ip_payload bytes over mtu
+
+    Every fragment repeats the IP header, and all but the last carry a
+    multiple of 8 data bytes, because the offset field counts 8-byte
+    units (RFC 791).
+    """
+    if ip_header + ip_payload <= mtu:
+        return 1
+    per_fragment = (mtu - ip_header) // 8 * 8
+    return -(-ip_payload // per_fragment)
+
 def compare_fragment_sizes():
     """Compare different packet sizes"""
     print_section("Testing Different Packet Sizes")
@@ -132,13 +153,8 @@ def compare_fragment_sizes():
         # IP header (20) + ICMP header (8) + payload
         total = 20 + 8 + size
         
-        if total <= mtu:
-            fragments = 1
-            status = "No fragmentation"
-        else:
-            # Simplified fragment calculation
-            fragments = (total + mtu - 1) // mtu
-            status = "Fragmented"
+        fragments = fragment_count(8 + size, mtu)
+        status = "No fragmentation" if fragments == 1 else "Fragmented"
         
         print(f"{size:<15} {total:<15} {fragments:<15} {status}")
 
@@ -156,7 +172,7 @@ def demonstrate_df_flag():
     print(f"   Result: Will be sent normally")
     
     # Large packet with DF
-    large = IP(dst="8.8.8.8", flags="DF")/ICMP()/Raw("X"*2000)
+    large = IP(dst="8.8.8.8", flags="DF")/ICMP()/Raw(PAYLOAD[:2000])
     print(f"\n2. Large packet with DF:")
     print(f"   Size: {len(large)} bytes")
     print(f"   DF flag: {bool(large.flags & 2)}")
@@ -164,17 +180,13 @@ def demonstrate_df_flag():
     print(f"   ICMP: Type 3, Code 4 (Fragmentation Needed)")
     
     # Large packet without DF
-    large_no_df = IP(dst="8.8.8.8")/ICMP()/Raw("X"*2000)
+    large_no_df = IP(dst="8.8.8.8")/ICMP()/Raw(PAYLOAD[:2000])
     print(f"\n3. Large packet without DF:")
     print(f"   Size: {len(large_no_df)} bytes")
     print(f"   DF flag: {bool(large_no_df.flags & 2)}")
     print(f"   Result: Router will fragment")
 
-def show_fragmentation_example():
-    """Show a complete fragmentation example"""
-    print_section("Complete Fragmentation Example")
-    
-    print("""
+FRAGMENTATION_EXAMPLE = section_text("Complete Fragmentation Example", """
 Original packet: 2000 bytes total
 MTU: 1500 bytes
 IP header: 20 bytes
@@ -202,6 +214,10 @@ Destination receives:
   5. Delivers to upper layer
     """)
 
+def show_fragmentation_example():
+    """Show a complete fragmentation example"""
+    sys.stdout.write(FRAGMENTATION_EXAMPLE)
+
 def main():
     """Main demonstration function"""
     print("\n" + "="*60)
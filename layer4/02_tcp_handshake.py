@@ -17,8 +17,21 @@ EXPERIMENT IDEAS:
 3. Analyze failed handshakes
 """
 
-from scapy.all import IP, TCP, sr1, send, sniff
-import random
+from scapy.config import conf
+from scapy.interfaces import resolve_iface
+from scapy.layers.inet import IP, TCP
+from scapy.sendrecv import sniff
+import atexit
+import functools
+import os
+
+# TCP flag bits
+TCP_SYN = 0x02
+TCP_RST = 0x04
+TCP_ACK = 0x10
+
+# Raw layer-3 sockets shared by every packet this demo sends, by interface
+l3_sockets = {}
 
 def print_section(title):
     """Pretty print section headers"""
@@ -93,13 +106,52 @@ Common Flag Combinations:
 - RST-ACK:       Abrupt close with ack
     """)
 
+def get_l3_socket(dst_ip):
+    """Open the raw IP socket for dst_ip's interface once, then reuse it
+
+    send() and sr1() open (and close) a new raw socket on every call;
+    keeping one per interface for the whole run avoids that setup per
+    packet. The interface is picked from the routing table, as sr1() does.
+    """
+    iface = resolve_iface(conf.route.route(dst_ip)[0] or conf.iface)
+    if iface.name not in l3_sockets:
+        sock = iface.l3socket(False)(iface=iface)
+        atexit.register(sock.close)
+        l3_sockets[iface.name] = sock
+    return l3_sockets[iface.name]
+
+@functools.lru_cache(maxsize=128)
+def tcp_template(dst_ip, dst_port):
+    """IP/TCP packet to dst_ip:dst_port, built once and copied per use"""
+    return IP(dst=dst_ip)/TCP(dport=dst_port)
+
+def tcp_packet(dst_ip, dst_port, src_port, flags, seq, ack=0):
+    """Copy the cached template and fill in this segment's fields"""
+    packet = tcp_template(dst_ip, dst_port).copy()
+    tcp = packet[TCP]
+    tcp.sport = src_port
+    tcp.flags = flags
+    tcp.seq = seq
+    tcp.ack = ack
+    return packet
+
+def random_port_and_isn():
+    """Pick a source port (1024-65535) and an ISN from one os.urandom() call
+
+    Real TCP stacks use unpredictable ISNs so that other hosts cannot
+    guess sequence numbers; os.urandom() gives that, unlike random.
+    """
+    data = os.urandom(6)
+    src_port = 1024 + int.from_bytes(data[:2], 'big') % (65536 - 1024)
+    isn = int.from_bytes(data[2:], 'big')
+    return src_port, isn
+
 def create_syn_packet(dst_ip, dst_port):
     """Create SYN packet (Step 1)"""
     print_section("Step 1: Creating SYN Packet")
     
     # Random source port and sequence number
-    src_port = random.randint(1024, 65535)
-    seq_num = random.randint(0, 2**32 - 1)
+    src_port, seq_num = random_port_and_isn()
     
     # Create SYN packet
     syn = IP(dst=dst_ip)/TCP(sport=src_port, dport=dst_port, 
@@ -123,8 +175,7 @@ def perform_handshake(dst_ip, dst_port):
     print_section(f"Performing 3-Way Handshake to {dst_ip}:{dst_port}")
     
     # Generate random source port and ISN
-    src_port = random.randint(1024, 65535)
-    client_isn = random.randint(0, 2**32 - 1)
+    src_port, client_isn = random_port_and_isn()
     
     print(f"\n🔹 Client ISN: {client_isn}")
     print(f"🔹 Source Port: {src_port}\n")
@@ -132,12 +183,12 @@ def perform_handshake(dst_ip, dst_port):
     # Step 1: Send SYN
     print("Step 1: Sending SYN")
     print("-" * 40)
-    syn = IP(dst=dst_ip)/TCP(sport=src_port, dport=dst_port, 
-                             flags='S', seq=client_isn)
+    syn = tcp_packet(dst_ip, dst_port, src_port, 'S', client_isn)
     print(f"→ SYN: seq={client_isn}, ack=0, flags=S")
     
     # Send and wait for SYN-ACK
-    syn_ack = sr1(syn, timeout=5, verbose=0)
+    sock = get_l3_socket(dst_ip)
+    syn_ack = sock.sr1(syn, timeout=5, verbose=0)
     
     if syn_ack is None:
         print("✗ No SYN-ACK received (timeout)")
@@ -161,15 +212,16 @@ def perform_handshake(dst_ip, dst_port):
     print(f"← SYN-ACK: seq={server_isn}, ack={ack_num}, flags={flags}")
     print(f"🔹 Server ISN: {server_isn}")
     
-    # Verify SYN-ACK
-    if 'S' in str(flags) and 'A' in str(flags):
+    # Verify SYN-ACK (test the flag bits instead of formatting a string)
+    flag_bits = int(flags)
+    if flag_bits & (TCP_SYN | TCP_ACK) == TCP_SYN | TCP_ACK:
         if ack_num == client_isn + 1:
             print("✓ SYN-ACK is valid!")
             print(f"✓ Server acknowledged our seq+1: {client_isn} + 1 = {ack_num}")
         else:
             print("✗ Invalid ACK number")
             return False
-    elif 'R' in str(flags):
+    elif flag_bits & TCP_RST:
         print("✗ Connection refused (RST received)")
         return False
     else:
@@ -179,11 +231,10 @@ def perform_handshake(dst_ip, dst_port):
     # Step 3: Send ACK
     print("\nStep 3: Sending ACK")
     print("-" * 40)
-    ack = IP(dst=dst_ip)/TCP(sport=src_port, dport=dst_port,
-                             flags='A', seq=client_isn+1, 
-                             ack=server_isn+1)
+    ack = tcp_packet(dst_ip, dst_port, src_port, 'A', client_isn+1,
+                     ack=server_isn+1)
     print(f"→ ACK: seq={client_isn+1}, ack={server_isn+1}, flags=A")
-    send(ack, verbose=0)
+    sock.send(ack)
     
     print("\n✅ TCP Connection Established!")
     print("\nSequence Number Summary:")